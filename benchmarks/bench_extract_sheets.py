@@ -0,0 +1,42 @@
+"""
+Benchmark reading back sheets extracted by `extract_sheets_from_Excel` as CSV, Parquet and Feather.
+
+Run with:
+    python benchmarks/bench_extract_sheets.py [n_rows] [n_sheets]
+"""
+
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+from run_benchmarks import make_workbook
+from vegetable_patch.dataframe_utils import extract_sheets_from_Excel
+
+
+READ_FUNCTIONS = {'csv': pd.read_csv, 'parquet': pd.read_parquet, 'feather': pd.read_feather}
+
+
+def main(n_rows:int=50_000, n_sheets:int=2) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        read_path = tmp_dir / 'workbook.xlsx'
+        make_workbook(read_path, n_rows, n_sheets)
+
+        print(f'rows={n_rows:,} sheets={n_sheets}')
+        for output_format, read_function in READ_FUNCTIONS.items():
+            output_dir = tmp_dir / output_format
+            output_dir.mkdir()
+
+            extract_time = timeit.timeit(lambda: extract_sheets_from_Excel(read_path, output_dir, output_format=output_format), number=1)
+            write_paths = sorted(output_dir.iterdir())
+            read_time = min(timeit.repeat(lambda: [read_function(path) for path in write_paths], number=1, repeat=5))
+            size = sum(path.stat().st_size for path in write_paths)
+
+            print(f'{output_format:8} extract: {extract_time:7.3f} s  read back: {read_time:7.4f} s  size: {size / 1e6:6.2f} MB')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
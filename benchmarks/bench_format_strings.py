@@ -0,0 +1,36 @@
+"""
+Benchmark `format_strings` against the `Series.apply(format_string)` baseline.
+
+Run with:
+    python benchmarks/bench_format_strings.py [n_rows] [n_unique]
+"""
+
+import sys
+import timeit
+
+import pandas as pd
+
+from run_benchmarks import make_strings
+from vegetable_patch.string_utils import format_string, format_strings
+
+
+SETTINGS = dict(sep='_', case_to='capitalize', capitalize_substrings=True, ignore_words=['pH', '3D'])
+
+
+def main(n_rows:int=1_000_000, n_unique:int=10_000) -> None:
+    series = pd.Series(make_strings(n_rows, n_unique), name='strings')
+
+    baseline = series.apply(format_string, **SETTINGS)
+    assert format_strings(series, **SETTINGS).equals(baseline)
+
+    apply_time = min(timeit.repeat(lambda: series.apply(format_string, **SETTINGS), number=1, repeat=3))
+    batch_time = min(timeit.repeat(lambda: format_strings(series, **SETTINGS), number=1, repeat=3))
+
+    print(f'rows={n_rows:,} unique={n_unique:,}')
+    print(f'Series.apply(format_string): {apply_time:.3f} s')
+    print(f'format_strings:              {batch_time:.3f} s')
+    print(f'speedup:                     {apply_time / batch_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,339 @@
+"""
+Benchmark suite for the hot paths of string_utils, path_utils and dataframe_utils, on synthetic data of several sizes.
+
+Results are stored as JSON, and can be compared against a stored baseline to flag regressions.
+
+The data generators (`make_strings`, `make_workbook`, ...) are also used by the standalone benchmark scripts in this directory.
+
+Run with:
+    python benchmarks/run_benchmarks.py --size small --output results.json
+    python benchmarks/run_benchmarks.py --size medium --baseline benchmarks/baseline.json --threshold 0.25
+    python benchmarks/run_benchmarks.py --size small --filter string_utils --save-baseline benchmarks/baseline.json
+
+Sizes:
+    small   10^3-10^4 strings, frames with 10-100 columns, a 2 sheet workbook (about half a minute; for quick checks)
+    medium  10^3-10^6 strings, frames with 10-5,000 columns, a 4 sheet workbook (a few minutes)
+    large   10^3-10^7 strings, frames with 10-5,000 columns, an 8 sheet workbook (tens of minutes, and several GB of memory)
+
+The exit code is 1 if any benchmark regressed against the baseline, so the suite can be used as a CI gate.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Iterator, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from vegetable_patch.dataframe_utils import extract_sheets_from_Excel, reorder_columns, set_column_order, store_dtypes_as_csv, store_dtypes_as_json
+from vegetable_patch.path_utils import FileIndex, check_paths
+from vegetable_patch.string_utils import (
+    CaseInsensitiveReplacer,
+    dayfirst_to_international_format_date,
+    format_string,
+    format_strings,
+    replace_case_insensitive,
+)
+
+
+SIZES = {
+    'small': dict(n_strings=[1_000, 10_000], n_columns=[10, 100], n_files=[1_000], n_rows=1_000, n_sheets=2),
+    'medium': dict(n_strings=[1_000, 100_000, 1_000_000], n_columns=[10, 500, 5_000], n_files=[1_000, 10_000], n_rows=10_000, n_sheets=4),
+    'large': dict(n_strings=[1_000, 100_000, 1_000_000, 10_000_000], n_columns=[10, 500, 5_000], n_files=[1_000, 10_000, 100_000], n_rows=50_000, n_sheets=8),
+}
+
+# Scalar functions are timed on at most this many strings, since calling them once per string is what the batch paths avoid:
+MAX_SCALAR_STRINGS = 100_000
+
+FORMAT_SETTINGS = dict(sep='_', case_to='capitalize', capitalize_substrings=True, ignore_words=['pH', '3D'])
+REPLACEMENTS = {'ecoli': 'E. coli', 'ph': 'pH', 'rna-seq': 'RNA-seq', 'control': 'Control', 'sample': 'Sample'}
+WORDS = np.array(['sample', 'GENE', 'pH', '3D', 'value', 'Control', 'treated', 'batch', 'ecoli', 'rna-seq'])
+
+
+class Benchmark(NamedTuple):
+    """
+    A single benchmark: `function` is called without arguments, on data that was generated beforehand.
+    """
+    name: str
+    params: dict[str, Any]
+    function: Callable[[], Any]
+
+
+
+def make_strings(n_strings:int, n_unique:Optional[int]=None, seed:int=0) -> np.ndarray:
+    """Make `n_strings` messy strings drawn from `n_unique` distinct values, by default roughly sqrt(n_strings) * 10."""
+    rng = np.random.default_rng(seed)
+    if n_unique is None:
+        n_unique = min(n_strings, max(100, int(n_strings ** 0.5) * 10))
+    uniques = np.array([
+        '__'.join(rng.choice(WORDS, size=rng.integers(1, 6))) + f'_{i}  '
+        for i in range(n_unique)
+    ])
+    return uniques[rng.integers(0, n_unique, size=n_strings)]
+
+
+
+def make_dates_text(n_dates:int, seed:int=0) -> str:
+    """Make a text of `n_dates` lines, each with a day-first date."""
+    rng = np.random.default_rng(seed)
+    days, months, years = rng.integers(1, 29, size=n_dates), rng.integers(1, 13, size=n_dates), rng.integers(1990, 2030, size=n_dates)
+    return '\n'.join(f'sample {i};{day:02d}.{month:02d}.{year}' for i, (day, month, year) in enumerate(zip(days, months, years)))
+
+
+
+def make_frame(n_columns:int, n_rows:int=100, seed:int=0) -> pd.DataFrame:
+    """Make a frame with `n_columns` columns of alternating int, float, string and category dtypes."""
+    rng = np.random.default_rng(seed)
+    makers = (
+        lambda: rng.integers(0, 1000, size=n_rows),
+        lambda: rng.normal(size=n_rows),
+        lambda: rng.choice(WORDS, size=n_rows),
+        lambda: pd.Categorical(rng.choice(WORDS[:3], size=n_rows)),
+    )
+    return pd.DataFrame({f'col_{i}': makers[i % len(makers)]() for i in range(n_columns)})
+
+
+
+def make_workbook(path:Path, n_rows:int, n_sheets:int, seed:int=0) -> None:
+    """Write a workbook with `n_sheets` sheets of `n_rows` rows of mixed column types."""
+    rng = np.random.default_rng(seed)
+    with pd.ExcelWriter(path) as writer:
+        for i in range(n_sheets):
+            pd.DataFrame({
+                'id': np.arange(n_rows),
+                'value': rng.normal(size=n_rows),
+                'count': rng.integers(0, 1000, size=n_rows),
+                'group': rng.choice(['control', 'treated', 'blank'], size=n_rows),
+                'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, size=n_rows), unit='D'),
+            }).to_excel(writer, sheet_name=f'sheet_{i}', index=False)
+
+
+
+def make_file_tree(root:Path, n_files:int, files_per_directory:int=100) -> list[Path]:
+    """Create `n_files` empty files in nested directories under `root`, and return their paths."""
+    paths = []
+    for i in range(n_files):
+        directory = root / f'dir_{i // (files_per_directory * 10)}' / f'sub_{i // files_per_directory}'
+        if i % files_per_directory == 0:
+            directory.mkdir(parents=True, exist_ok=True)
+        path = directory / (f'file_{i}.csv' if i % 2 else f'file_{i}.txt')
+        path.touch()
+        paths.append(path)
+    return paths
+
+
+
+def string_benchmarks(size:dict[str, Any]) -> Iterator[Benchmark]:
+    """Benchmarks of string_utils."""
+    replacer = CaseInsensitiveReplacer(REPLACEMENTS, whole_words=True)
+    for n_strings in size['n_strings']:
+        strings = make_strings(n_strings)
+        series = pd.Series(strings, name='strings')
+        text = '\n'.join(strings)
+        dates_text = make_dates_text(n_strings)
+        params = {'n_strings': n_strings}
+
+        if n_strings <= MAX_SCALAR_STRINGS:
+            scalar_strings = strings.tolist()
+            yield Benchmark('string_utils.format_string', params, lambda scalar_strings=scalar_strings: [format_string(string, **FORMAT_SETTINGS) for string in scalar_strings])
+        yield Benchmark('string_utils.format_strings', params, lambda series=series: format_strings(series, **FORMAT_SETTINGS))
+        yield Benchmark('string_utils.replace_case_insensitive', params, lambda text=text: replace_case_insensitive(text, 'ecoli', 'E. coli'))
+        yield Benchmark('string_utils.CaseInsensitiveReplacer', params, lambda text=text: replacer(text))
+        yield Benchmark('string_utils.dayfirst_to_international_format_date', params, lambda dates_text=dates_text: dayfirst_to_international_format_date(dates_text))
+
+
+
+def path_benchmarks(size:dict[str, Any], tmp_dir:Path) -> Iterator[Benchmark]:
+    """Benchmarks of path_utils."""
+    for n_files in size['n_files']:
+        root = tmp_dir / f'tree_{n_files}'
+        paths = make_file_tree(root, n_files)
+        index = FileIndex(root)
+        params = {'n_files': n_files}
+
+        yield Benchmark('path_utils.check_paths', params, lambda paths=paths: check_paths(paths, max_workers=8))
+        yield Benchmark('path_utils.FileIndex.build', params, lambda root=root: FileIndex(root))
+        yield Benchmark('path_utils.FileIndex.refresh', params, lambda index=index: index.refresh())
+        yield Benchmark('path_utils.FileIndex.rglob', params, lambda index=index: index.rglob('*.csv'))
+
+
+
+def dataframe_benchmarks(size:dict[str, Any], tmp_dir:Path) -> Iterator[Benchmark]:
+    """Benchmarks of dataframe_utils."""
+    for n_columns in size['n_columns']:
+        df = make_frame(n_columns)
+        columns = list(df.columns)
+        rng = np.random.default_rng(0)
+        moves = [tuple(rng.choice(columns, size=2, replace=False)) for _ in range(100)]
+        params = {'n_columns': n_columns}
+
+        yield Benchmark('dataframe_utils.set_column_order', params, lambda df=df, columns=columns: set_column_order(df, columns[0], columns[-1]))
+        yield Benchmark('dataframe_utils.reorder_columns', {**params, 'n_moves': len(moves)}, lambda df=df, moves=moves: reorder_columns(df, moves=moves))
+        yield Benchmark('dataframe_utils.store_dtypes_as_csv', params, lambda df=df: store_dtypes_as_csv(df, full_path=tmp_dir / 'dtypes.csv'))
+        yield Benchmark('dataframe_utils.store_dtypes_as_json', params, lambda df=df: store_dtypes_as_json(df, full_path=tmp_dir / 'dtypes.json'))
+
+    read_path = tmp_dir / 'workbook.xlsx'
+    make_workbook(read_path, size['n_rows'], size['n_sheets'])
+    params = {'n_rows': size['n_rows'], 'n_sheets': size['n_sheets']}
+    for output_format in ('csv', 'parquet'):
+        output_dir = tmp_dir / f'sheets_{output_format}'
+        output_dir.mkdir()
+        yield Benchmark(
+            f'dataframe_utils.extract_sheets_from_Excel[{output_format}]', params,
+            lambda output_dir=output_dir, output_format=output_format: extract_sheets_from_Excel(read_path, output_dir, output_format=output_format),
+        )
+        yield Benchmark(
+            f'dataframe_utils.extract_sheets_from_Excel[{output_format},max_workers={size["n_sheets"]}]', params,
+            lambda output_dir=output_dir, output_format=output_format: extract_sheets_from_Excel(read_path, output_dir, output_format=output_format, max_workers=size['n_sheets']),
+        )
+
+
+
+def benchmark_key(benchmark:Benchmark) -> str:
+    """Unique name of a benchmark and its parameters, e.g. 'string_utils.format_strings(n_strings=1000)'."""
+    params = ','.join(f'{key}={value}' for key, value in benchmark.params.items())
+    return f'{benchmark.name}({params})'
+
+
+
+def time_benchmark(benchmark:Benchmark, repeat:int, autorange:bool=True) -> dict[str, Any]:
+    """
+    Time a benchmark `repeat` times. With `autorange`, fast functions are called several times per repeat (for at least 0.2 seconds
+    in total). Times are reported per call.
+    """
+    timer = timeit.Timer(benchmark.function)
+    number = timer.autorange()[0] if autorange else 1
+    times = [time / number for time in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'name': benchmark.name,
+        'params': benchmark.params,
+        'number': number,
+        'repeat': repeat,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.fmean(times),
+    }
+
+
+
+def metadata(size:str) -> dict[str, Any]:
+    """Describe the environment a run was made in, so that results from different machines are not mistaken for regressions."""
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        package_version = version('vegetable_patch')
+    except PackageNotFoundError:
+        package_version = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'size': size,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'vegetable_patch': package_version,
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+    }
+
+
+
+def run(size:str='small', repeat:int=5, name_filter:Optional[str]=None, verbose:bool=True) -> dict[str, Any]:
+    """
+    Run the benchmarks of a size preset, and return the results as a JSON-serializable dict: {'metadata': {...}, 'results': {key: {...}}}.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        benchmarks = [
+            string_benchmarks(SIZES[size]),
+            path_benchmarks(SIZES[size], tmp_dir),
+            dataframe_benchmarks(SIZES[size], tmp_dir),
+        ]
+        for benchmark in (benchmark for group in benchmarks for benchmark in group):
+            key = benchmark_key(benchmark)
+            if name_filter and name_filter not in key:
+                continue
+            # Slow benchmarks are timed fewer times, and not repeated within a repeat:
+            first_time = timeit.timeit(benchmark.function, number=1)
+            result = time_benchmark(benchmark, repeat=repeat if first_time < 10 else 1, autorange=first_time < 0.02)
+            results[key] = result
+            if verbose:
+                print(f'{key:90} median {result["median"] * 1e3:10.3f} ms  min {result["min"] * 1e3:10.3f} ms', flush=True)
+
+    return {'metadata': metadata(size), 'results': results}
+
+
+
+def compare(results:dict[str, Any], baseline:dict[str, Any], threshold:float=0.25) -> list[dict[str, Any]]:
+    """
+    Compare the median times of a run against a baseline, and return the benchmarks that are more than `threshold` (as a fraction) slower.
+    Benchmarks that are only in one of them are ignored.
+    """
+    regressions = []
+    for key, result in results['results'].items():
+        baseline_result = baseline['results'].get(key)
+        if baseline_result is None:
+            continue
+        ratio = result['median'] / baseline_result['median']
+        if ratio > 1 + threshold:
+            regressions.append({'key': key, 'baseline': baseline_result['median'], 'current': result['median'], 'ratio': ratio})
+    return regressions
+
+
+
+def print_comparison(results:dict[str, Any], baseline:dict[str, Any]) -> None:
+    """Print the ratio of current to baseline median times for all benchmarks in both."""
+    for key, result in results['results'].items():
+        baseline_result = baseline['results'].get(key)
+        if baseline_result is not None:
+            print(f'{key:90} {result["median"] / baseline_result["median"]:6.2f}x baseline')
+
+
+
+def main(argv:Optional[list[str]]=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--size', choices=SIZES, default='small', help='Size preset of the synthetic data. Defaults to small.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of times each benchmark is timed. Defaults to 5.')
+    parser.add_argument('--filter', dest='name_filter', help='Only run benchmarks whose name contains this string.')
+    parser.add_argument('--output', type=Path, help='Store the results as JSON to this path.')
+    parser.add_argument('--baseline', type=Path, help='Compare the results against the results stored in this JSON file.')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Flag benchmarks that are this fraction slower than the baseline. Defaults to 0.25.')
+    parser.add_argument('--save-baseline', type=Path, help='Store the results as the new baseline to this path.')
+    args = parser.parse_args(argv)
+
+    results = run(args.size, args.repeat, args.name_filter)
+
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            path.write_text(json.dumps(results, indent=4))
+            print(f'Results stored to {path}')
+
+    if args.baseline is None:
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline['metadata'].get('machine') != results['metadata']['machine'] or baseline['metadata'].get('python') != results['metadata']['python']:
+        print('Warning: the baseline was made on another machine or Python version, so times may not be comparable.')
+    print_comparison(results, baseline)
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(
+            f'REGRESSION {regression["key"]}: {regression["baseline"] * 1e3:.3f} ms -> {regression["current"] * 1e3:.3f} ms '
+            f'({regression["ratio"]:.2f}x)'
+        )
+    if not regressions:
+        print(f'No regressions (threshold {args.threshold:.0%}).')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
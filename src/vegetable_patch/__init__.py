@@ -4,6 +4,19 @@ __author__ = """Marius Dobbe Klemetsen"""
 __email__ = 'marius.klemetsen@outlook.com'
 __version__ = '0.1.0'
 
-from . import dataframe_utils
-from . import path_utils
-from . import string_utils
\ No newline at end of file
+import importlib
+
+# Subpackages are imported on first access (PEP 562), so e.g. using string_utils does not import pandas:
+_SUBMODULES = ('aio', 'dataframe_utils', 'instrumentation', 'path_utils', 'string_utils')
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        module = importlib.import_module(f'.{name}', __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_SUBMODULES))
@@ -0,0 +1,8 @@
+"""Allow running the command line with `python -m vegetable_patch`."""
+
+import sys
+
+from .cli import main
+
+
+sys.exit(main())
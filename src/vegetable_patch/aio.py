@@ -0,0 +1,271 @@
+"""
+Asyncio versions of the blocking file utilities, for use in event loops.
+
+The blocking work (file system calls, pandas and file writes) runs in a bounded thread pool, so the event loop stays responsive,
+and many file checks or small schema writes overlap. A concurrency limit bounds the number of calls that are queued or running at once,
+e.g. to bound the memory held by DataFrames that wait to be written.
+
+Example:
+    from vegetable_patch import aio
+
+    aio.configure(max_workers=16, max_concurrency=64)
+    checks = await aio.check_paths(input_paths)
+    schema_paths = await asyncio.gather(*(aio.store_dtypes_as_json(df, full_path=path) for df, path in frames))
+
+Cancelling a coroutine removes its call from the queue if it has not started yet. A call that is already running in a thread cannot be
+interrupted, but all outputs are written atomically, so it never leaves a partial file behind. `extract_sheets_from_Excel` runs one sheet
+at a time, so cancelling it stops after the sheet that is being written.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import weakref
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, TypeVar
+
+from .dataframe_utils.utils import _extract_sheet, _plan_sheet_extraction
+from .path_utils.utils import PathCheck, _check_path
+from . import dataframe_utils, path_utils
+
+
+_T = TypeVar('_T')
+
+
+
+class AsyncRunner:
+    """
+    Runs blocking functions in a thread pool from coroutines, with at most `max_concurrency` calls queued or running at once.
+    The module-level functions of `vegetable_patch.aio` use a shared runner, see `configure`.
+
+    Example:
+        async with AsyncRunner(max_workers=8) as runner:
+            await runner.check_read_file('data.csv')
+            await runner.run(some_blocking_function, argument)
+
+    Args:
+        max_workers (Optional[int], optional): Number of threads. Defaults to None, which uses the default of `ThreadPoolExecutor`.
+        max_concurrency (Optional[int], optional): Maximum number of calls that are queued or running at once. Further calls wait
+            (without blocking the event loop) until a call finishes. Defaults to None, which does not limit them.
+        executor (Optional[Executor], optional): Use this executor instead of making a thread pool. It is not shut down by `close`.
+            Defaults to None.
+
+    Raises:
+        ValueError: `max_concurrency` is not positive.
+    """
+
+    def __init__(self, max_workers:Optional[int]=None, max_concurrency:Optional[int]=None, executor:Optional[Executor]=None) -> None:
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(f'`max_concurrency` must be positive, currently {max_concurrency=}.')
+
+        self.max_concurrency = max_concurrency
+        self._owns_executor = executor is None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vegetable_patch_aio') if executor is None else executor
+        # Semaphores belong to an event loop, so there is one per loop the runner is used from:
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
+
+    async def __aenter__(self) -> 'AsyncRunner':
+        return self
+
+    async def __aexit__(self, exc_type:Any, exc_value:Any, traceback:Any) -> None:
+        if self._owns_executor:
+            # Wait for running calls without blocking the event loop:
+            await asyncio.get_running_loop().run_in_executor(None, functools.partial(self._executor.shutdown, wait=True, cancel_futures=True))
+
+    def close(self) -> None:
+        """
+        Shut the thread pool down without waiting for running calls, and drop queued calls.
+        """
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, function:Callable[..., _T], /, *args:Any, **kwargs:Any) -> _T:
+        """
+        Call `function(*args, **kwargs)` in the thread pool, and return its result.
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(function, *args, **kwargs)
+        if self.max_concurrency is None:
+            return await loop.run_in_executor(self._executor, call)
+
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            return await loop.run_in_executor(self._executor, call)
+
+    async def check_read_file(self, file_path:str | os.PathLike) -> None:
+        """
+        Async version of `path_utils.check_read_file`.
+        """
+        await self.run(path_utils.check_read_file, file_path)
+
+    async def check_write_file(self, file_path:str | os.PathLike) -> None:
+        """
+        Async version of `path_utils.check_write_file`.
+        """
+        await self.run(path_utils.check_write_file, file_path)
+
+    async def check_paths(self, paths:Iterable[str | os.PathLike], mode:str='r') -> list[PathCheck]:
+        """
+        Async version of `path_utils.check_paths`, where each path is checked as a separate call in the thread pool.
+        """
+        VALID_MODES = ('r', 'w')
+        if mode not in VALID_MODES:
+            raise ValueError(f'Mode must be one of {VALID_MODES}, currently {mode=}.')
+
+        return list(await asyncio.gather(*(self.run(_check_path, path, mode) for path in paths)))
+
+    async def store_dtypes_as_csv(self, df:Any, *args:Any, **kwargs:Any) -> Path:
+        """
+        Async version of `dataframe_utils.store_dtypes_as_csv`, with the same arguments.
+        """
+        return await self.run(dataframe_utils.store_dtypes_as_csv, df, *args, **kwargs)
+
+    async def store_dtypes_as_json(self, df:Any, *args:Any, **kwargs:Any) -> Path:
+        """
+        Async version of `dataframe_utils.store_dtypes_as_json`, with the same arguments.
+        """
+        return await self.run(dataframe_utils.store_dtypes_as_json, df, *args, **kwargs)
+
+    async def store_dtypes_from_file(self, read_path:str | Path, *args:Any, **kwargs:Any) -> tuple[Path, Any]:
+        """
+        Async version of `dataframe_utils.store_dtypes_from_file`, with the same arguments.
+        """
+        return await self.run(dataframe_utils.store_dtypes_from_file, read_path, *args, **kwargs)
+
+    async def extract_sheets_from_Excel(
+        self,
+        read_path: str | Path,
+        path_storage_dir: str | Path,
+        file_name_prefix: str = '',
+        file_name_suffix: str = '',
+        chunk_size: Optional[int] = None,
+        output_format: str = 'csv',
+        compression: Optional[str] = 'default',
+        sheet_names: Optional[Iterable[str]] = None,
+        fsync: bool = False,
+    ) -> list[Path]:
+        """
+        Async version of `dataframe_utils.extract_sheets_from_Excel`, with the same arguments except `max_workers`.
+        Each sheet is extracted as a separate call in the thread pool, so cancelling stops after the sheet that is being written.
+        """
+        read_path = Path(read_path)
+
+        def open_workbook() -> tuple[Any, dict[str, Path], Optional[str]]:
+            # Runs in the thread pool, so that also importing pandas does not block the event loop:
+            import pandas as pd
+
+            xl_file = pd.ExcelFile(read_path)
+            try:
+                return (xl_file, *_plan_sheet_extraction(
+                    xl_file, read_path, path_storage_dir, file_name_prefix, file_name_suffix, chunk_size, output_format, compression, sheet_names
+                ))
+            except BaseException:
+                xl_file.close()
+                raise
+
+        xl_file, write_paths, compression = await self.run(open_workbook)
+        # When cancelled, a sheet may still be running in a thread, so the workbook is only closed after it is done:
+        lock = threading.Lock()
+
+        def extract_sheet(sheet:str, write_path:Path) -> None:
+            with lock:
+                # The opened workbook is reused unless streaming, like `extract_sheets_from_Excel`:
+                _extract_sheet(read_path if chunk_size else xl_file, sheet, write_path, chunk_size, output_format, compression, fsync)
+
+        def close_workbook() -> None:
+            with lock:
+                xl_file.close()
+
+        try:
+            for sheet, write_path in write_paths.items():
+                await self.run(extract_sheet, sheet, write_path)
+        finally:
+            try:
+                self._executor.submit(close_workbook)
+            except RuntimeError:  # The executor is shut down
+                close_workbook()
+
+        return list(write_paths.values())
+
+
+
+_runner: Optional[AsyncRunner] = None
+
+
+
+def configure(max_workers:Optional[int]=None, max_concurrency:Optional[int]=None, executor:Optional[Executor]=None) -> AsyncRunner:
+    """
+    Replace the runner used by the module-level functions, see `AsyncRunner` for the arguments. Calls already made with the previous runner
+    still finish in its thread pool, whose threads exit once those calls are done and the runner is no longer used.
+    """
+    global _runner
+    _runner = AsyncRunner(max_workers=max_workers, max_concurrency=max_concurrency, executor=executor)
+    return _runner
+
+
+
+def get_runner() -> AsyncRunner:
+    """
+    Return the runner used by the module-level functions, making a default one (no concurrency limit) on first use.
+    """
+    return _runner if _runner is not None else configure()
+
+
+
+async def check_read_file(file_path:str | os.PathLike) -> None:
+    """
+    Async version of `path_utils.check_read_file`.
+    """
+    await get_runner().check_read_file(file_path)
+
+
+
+async def check_write_file(file_path:str | os.PathLike) -> None:
+    """
+    Async version of `path_utils.check_write_file`.
+    """
+    await get_runner().check_write_file(file_path)
+
+
+
+async def check_paths(paths:Iterable[str | os.PathLike], mode:str='r') -> list[PathCheck]:
+    """
+    Async version of `path_utils.check_paths`.
+    """
+    return await get_runner().check_paths(paths, mode)
+
+
+
+async def store_dtypes_as_csv(df:Any, *args:Any, **kwargs:Any) -> Path:
+    """
+    Async version of `dataframe_utils.store_dtypes_as_csv`.
+    """
+    return await get_runner().store_dtypes_as_csv(df, *args, **kwargs)
+
+
+
+async def store_dtypes_as_json(df:Any, *args:Any, **kwargs:Any) -> Path:
+    """
+    Async version of `dataframe_utils.store_dtypes_as_json`.
+    """
+    return await get_runner().store_dtypes_as_json(df, *args, **kwargs)
+
+
+
+async def store_dtypes_from_file(read_path:str | Path, *args:Any, **kwargs:Any) -> tuple[Path, Any]:
+    """
+    Async version of `dataframe_utils.store_dtypes_from_file`.
+    """
+    return await get_runner().store_dtypes_from_file(read_path, *args, **kwargs)
+
+
+
+async def extract_sheets_from_Excel(read_path:str | Path, path_storage_dir:str | Path, **kwargs:Any) -> list[Path]:
+    """
+    Async version of `dataframe_utils.extract_sheets_from_Excel`, see `AsyncRunner.extract_sheets_from_Excel`.
+    """
+    return await get_runner().extract_sheets_from_Excel(read_path, path_storage_dir, **kwargs)
@@ -0,0 +1,330 @@
+"""
+Command-line entry point for running the file operations of the package on many files at once.
+
+    vegetable-patch extract-sheets data/*.xlsx --output-dir sheets --format parquet --jobs 8
+    vegetable-patch dump-dtypes exports/ --recursive --output-dir schemas --sep ';'
+    vegetable-patch normalize-dates 'logs/**/*.csv' --output-dir normalized --date-format dd.mm.yyyy --date-format d/m/yy
+
+Inputs are files, glob patterns, or directories (searched for `--pattern`). Files are processed in a process pool of `--jobs` processes,
+and a line with the timing of each file is printed as soon as it is done. The exit code is 1 if any file failed.
+Outputs keep the subdirectories of the inputs below a directory input, or below the part of a glob pattern without wildcards,
+so e.g. 'in/a/data.csv' and 'in/b/data.csv' found with `-r` are written to 'out/a/' and 'out/b/'.
+
+The commands are also available from Python, e.g. `run('dump-dtypes', ['exports/'], output_dir='schemas', jobs=4)`.
+pandas is only imported by the commands that need it, so e.g. `normalize-dates` starts quickly.
+"""
+
+import argparse
+import glob
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, NamedTuple, Optional, TextIO
+
+from .path_utils import FileIndex
+
+
+class FileResult(NamedTuple):
+    """
+    Result of running a command on a single input file.
+
+    Attributes:
+        path (Path): The input file.
+        outputs (list[Path]): The files that were written.
+        seconds (float): Wall time of processing the file.
+        error (Optional[str]): The error if the file failed, otherwise None.
+    """
+    path: Path
+    outputs: list[Path]
+    seconds: float
+    error: Optional[str]
+
+
+
+def _extract_sheets(path:Path, output_dir:Path, options:dict[str, Any]) -> list[Path]:
+    """
+    Extract all sheets of a workbook to '<output_dir>/<prefix><sheet name>.<format>', where the prefix defaults to '<workbook name>_'.
+    """
+    from .dataframe_utils import extract_sheets_from_Excel
+
+    return extract_sheets_from_Excel(
+        path,
+        output_dir,
+        file_name_prefix=options['prefix'].format(stem=path.stem),
+        output_format=options['format'],
+        compression=options['compression'],
+        chunk_size=options['chunk_size'],
+    )
+
+
+
+def _dump_dtypes(path:Path, output_dir:Path, options:dict[str, Any]) -> list[Path]:
+    """
+    Infer the dtype schema of a CSV or workbook in chunks, and store it to '<output_dir>/<file name>_dtypes.<format>'.
+    """
+    from .dataframe_utils import store_dtypes_from_file
+
+    read_csv_kwargs = {} if options['sep'] is None else {'sep': options['sep']}
+    schema_path, _ = store_dtypes_from_file(
+        path,
+        directory_path=output_dir,
+        file_name=f'{path.stem}_dtypes',
+        file_format=options['format'],
+        chunk_size=options['chunk_size'],
+        **read_csv_kwargs,
+    )
+    return [schema_path]
+
+
+
+def _normalize_dates(path:Path, output_dir:Path, options:dict[str, Any]) -> list[Path]:
+    """
+    Rewrite a text file with its day-first dates in the international format to '<output_dir>/<file name>'.
+    """
+    from .string_utils import DateNormalizer, dayfirst_to_international_format_date, rewrite_file
+
+    transform = DateNormalizer(options['date_formats']) if options['date_formats'] else dayfirst_to_international_format_date
+    write_path = output_dir / path.name
+    rewrite_file(path, write_path, transform, encoding=options['encoding'])
+    return [write_path]
+
+
+
+# Command name -> (function run per file, default pattern for directories, help):
+COMMANDS: dict[str, tuple[Callable[[Path, Path, dict[str, Any]], list[Path]], str, str]] = {
+    'extract-sheets': (_extract_sheets, '*.xlsx', 'Extract all sheets of Excel files to CSV, Parquet or Feather files.'),
+    'dump-dtypes': (_dump_dtypes, '*.csv', 'Infer and store the dtype schema of CSV or Excel files, without reading them into memory.'),
+    'normalize-dates': (_normalize_dates, '*.csv', 'Rewrite day-first dates in text files to the international format yyyy-mm-dd.'),
+}
+
+
+
+def _expand_inputs(inputs:Iterable[str | Path], pattern:str, recursive:bool=False) -> dict[Path, Path]:
+    """
+    Expand input arguments to files, mapped to the directory that their outputs are placed relative to: the directory input,
+    the part of a glob pattern without wildcards, or the parent directory of a file input.
+    """
+    bases: dict[Path, Path] = {}
+    for input_path in inputs:
+        input_path = Path(input_path)
+        if input_path.is_dir():
+            index = FileIndex(input_path)
+            base = input_path.resolve()
+            for path in index.rglob(pattern) if recursive else index.glob(pattern):
+                bases.setdefault(path, base)
+        elif input_path.is_file():
+            bases.setdefault(input_path, input_path.parent)
+        else:
+            matches = [Path(match) for match in glob.glob(str(input_path), recursive=True) if os.path.isfile(match)]
+            if not matches:
+                raise FileNotFoundError(f"No files match '{input_path}'.")
+            base = Path(*itertools.takewhile(lambda part: not glob.has_magic(part), input_path.parts))
+            for path in matches:
+                bases.setdefault(path, base)
+
+    return bases
+
+
+
+def expand_inputs(inputs:Iterable[str | Path], pattern:str, recursive:bool=False) -> list[Path]:
+    """
+    Expand input arguments to a sorted list of unique files.
+
+    Args:
+        inputs (Iterable[str | Path]): Files, glob patterns (e.g. 'data/**/*.xlsx'), or directories.
+        pattern (str): Glob pattern of the files to take from directories, e.g. '*.csv'.
+        recursive (bool, optional): Also take files from subdirectories of directories. Defaults to False.
+
+    Raises:
+        FileNotFoundError: An input is neither an existing file or directory, nor a pattern that matches any files.
+    """
+    return sorted(_expand_inputs(inputs, pattern, recursive))
+
+
+
+def _run_file(function:Callable[[Path, Path, dict[str, Any]], list[Path]], path:Path, output_dir:Path, options:dict[str, Any]) -> FileResult:
+    """
+    Run a command on a single file, and time it. Errors are returned rather than raised, so that one bad file does not stop a batch.
+    """
+    start = time.perf_counter()
+    try:
+        outputs = function(path, output_dir, options)
+        error = None
+    except Exception as e:
+        outputs, error = [], f'{type(e).__name__}: {e}'
+    return FileResult(path, outputs, time.perf_counter() - start, error)
+
+
+
+def run(
+    command:str,
+    inputs:Iterable[str | Path],
+    output_dir:str | Path,
+    jobs:int=1,
+    pattern:Optional[str]=None,
+    recursive:bool=False,
+    progress:Optional[Callable[[int, int, FileResult], Any]]=None,
+    **options:Any,
+) -> list[FileResult]:
+    """
+    Run a command on many files, in a process pool of `jobs` processes.
+
+    Args:
+        command (str): Choose; 'extract-sheets', 'dump-dtypes' or 'normalize-dates'.
+        inputs (Iterable[str | Path]): Files, glob patterns or directories, see `expand_inputs`.
+        output_dir (str | Path): Directory to write the outputs to, keeping the subdirectories of the inputs (see the module docstring).
+            Created if it does not exist.
+        jobs (int, optional): Number of processes. Defaults to 1, which processes the files in the current process.
+        pattern (Optional[str], optional): Glob pattern of the files to take from directories. Defaults to None, which uses '*.xlsx' for
+            'extract-sheets' and '*.csv' for the other commands.
+        recursive (bool, optional): Also take files from subdirectories of directories. Defaults to False.
+        progress (Optional[Callable[[int, int, FileResult], Any]], optional): Called with (number of finished files, number of files, result)
+            as soon as each file is done. Defaults to None.
+        **options: Options of the command, see `vegetable-patch <command> --help`. Missing options get the defaults of the command line.
+
+    Raises:
+        ValueError: `command` is not one of the commands, or `jobs` is not positive.
+        ValueError: Two inputs would write the same outputs, e.g. files with the same name from directories given as separate inputs.
+            Nothing is processed then.
+        FileNotFoundError: Same as `expand_inputs`.
+
+    Returns:
+        list[FileResult]: The results in the order of the (sorted) input files.
+    """
+    if command not in COMMANDS:
+        raise ValueError(f'Command must be one of {tuple(COMMANDS)}, currently {command=}.')
+    if jobs < 1:
+        raise ValueError(f'`jobs` must be positive, currently {jobs=}.')
+    function, default_pattern, _ = COMMANDS[command]
+
+    # Fill in the defaults of the command line for options that were not given:
+    defaults = vars(build_parser().parse_args([command, '--output-dir', str(output_dir)]))
+    options = {**{key: value for key, value in defaults.items() if key not in _COMMON_OPTIONS}, **options}
+
+    bases = _expand_inputs(inputs, pattern or default_pattern, recursive)
+    paths = sorted(bases)
+    output_dir = Path(output_dir)
+    output_dirs = {path: output_dir / path.parent.relative_to(bases[path]) for path in paths}
+
+    # Outputs are named after the input file (its name for 'normalize-dates', its stem otherwise), so check that no two inputs
+    # overwrite each other's outputs before processing anything:
+    seen: dict[tuple[Path, str], Path] = {}
+    for path in paths:
+        key = (output_dirs[path], path.name if command == 'normalize-dates' else path.stem)
+        if key in seen:
+            raise ValueError(f"Inputs '{seen[key]}' and '{path}' would write the same outputs to '{output_dirs[path]}'.")
+        seen[key] = path
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for directory in set(output_dirs.values()):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    results: dict[Path, FileResult] = {}
+    if jobs == 1 or len(paths) < 2:
+        for path in paths:
+            results[path] = result = _run_file(function, path, output_dirs[path], options)
+            if progress is not None:
+                progress(len(results), len(paths), result)
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+            futures = [executor.submit(_run_file, function, path, output_dirs[path], options) for path in paths]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.path] = result
+                if progress is not None:
+                    progress(len(results), len(paths), result)
+
+    return [results[path] for path in paths]
+
+
+
+# Options of all commands, which are arguments of `run` rather than command options:
+_COMMON_OPTIONS = ('command', 'inputs', 'output_dir', 'jobs', 'pattern', 'recursive', 'quiet')
+
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the parser of the `vegetable-patch` command line.
+    """
+    parser = argparse.ArgumentParser(prog='vegetable-patch', description='Run the file operations of vegetable_patch on many files at once.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subcommand_parsers = {}
+    for command, (_, default_pattern, help_text) in COMMANDS.items():
+        subparser = subparsers.add_parser(command, help=help_text, description=help_text)
+        subparser.add_argument('inputs', nargs='*', help='Files, glob patterns (quote them to use **), or directories.')
+        subparser.add_argument('-o', '--output-dir', required=True, type=Path, help='Directory to write the outputs to.')
+        subparser.add_argument('-j', '--jobs', type=int, default=1, help='Number of files to process in parallel. Defaults to 1.')
+        subparser.add_argument('--pattern', default=default_pattern, help=f'Files to take from directories. Defaults to {default_pattern!r}.')
+        subparser.add_argument('-r', '--recursive', action='store_true', help='Also take files from subdirectories of directories.')
+        subparser.add_argument('-q', '--quiet', action='store_true', help='Only print failures and the summary.')
+        subcommand_parsers[command] = subparser
+
+    extract_parser = subcommand_parsers['extract-sheets']
+    extract_parser.add_argument('--format', choices=('csv', 'parquet', 'feather'), default='csv', help='Output format. Defaults to csv.')
+    extract_parser.add_argument('--compression', default='default', help="Compression codec, e.g. 'gzip' or 'zstd'. Defaults to the default of the format.")
+    extract_parser.add_argument('--chunk-size', type=int, default=None, help='Stream each sheet in chunks of this many rows. Defaults to reading each sheet at once.')
+    extract_parser.add_argument('--prefix', default='{stem}_', help="Prefix of the output file names, where '{stem}' is the workbook name. Defaults to '{stem}_'.")
+
+    dtypes_parser = subcommand_parsers['dump-dtypes']
+    dtypes_parser.add_argument('--format', choices=('json', 'csv'), default='json', help='Format of the stored schemas. Defaults to json.')
+    dtypes_parser.add_argument('--chunk-size', type=int, default=100_000, help='Number of rows to read at a time. Defaults to 100000.')
+    dtypes_parser.add_argument('--sep', default=None, help="Separator of the CSV files. Defaults to ','.")
+
+    dates_parser = subcommand_parsers['normalize-dates']
+    dates_parser.add_argument(
+        '--date-format', dest='date_formats', action='append', default=None,
+        help="Day-first date format, e.g. 'dd.mm.yyyy' or 'd/m/yy'. Can be given several times. Defaults to 'dd.mm.yyyy' only (see `dayfirst_to_international_format_date`).",
+    )
+    dates_parser.add_argument('--encoding', default='utf-8', help='Encoding of the files. Defaults to utf-8.')
+
+    return parser
+
+
+
+def _print_progress(stream:TextIO, quiet:bool) -> Callable[[int, int, FileResult], None]:
+    """
+    Make a progress callback for `run` that prints a line per finished file.
+    """
+    def progress(n_done:int, n_total:int, result:FileResult) -> None:
+        if result.error is not None:
+            print(f'[{n_done}/{n_total}] FAILED {result.path} ({result.seconds:.2f} s): {result.error}', file=stream, flush=True)
+        elif not quiet:
+            print(f'[{n_done}/{n_total}] {result.path} ({result.seconds:.2f} s) -> {len(result.outputs)} file(s)', file=stream, flush=True)
+    return progress
+
+
+
+def main(argv:Optional[list[str]]=None) -> int:
+    """
+    Run the `vegetable-patch` command line, and return the exit code.
+    """
+    args = build_parser().parse_args(argv)
+    if not args.inputs:
+        print('No inputs given.', file=sys.stderr)
+        return 2
+
+    options = {key: value for key, value in vars(args).items() if key not in _COMMON_OPTIONS}
+    start = time.perf_counter()
+    try:
+        results = run(
+            args.command, args.inputs, args.output_dir, jobs=args.jobs, pattern=args.pattern, recursive=args.recursive,
+            progress=_print_progress(sys.stdout, args.quiet), **options,
+        )
+    except (FileNotFoundError, ValueError) as e:
+        print(f'{type(e).__name__}: {e}', file=sys.stderr)
+        return 2
+
+    n_failed = sum(result.error is not None for result in results)
+    print(f'{len(results) - n_failed} of {len(results)} file(s) done in {time.perf_counter() - start:.2f} s' + (f', {n_failed} failed.' if n_failed else '.'))
+    return 1 if n_failed else 0
+
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,33 +1,39 @@
 """ 
 """
 
+from __future__ import annotations
+
 from pathlib import Path
+import csv
+import hashlib
+import io
+import itertools
 import json
-import pandas as pd
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, Mapping, NamedTuple, Sequence
 
+from ..instrumentation import instrumented
+from .writers import atomic_path, atomic_write
 
-def store_dtypes_as_csv(
-    df: pd.DataFrame,
-    full_path: str | None = None,
-    directory_path: str | Path = "",
-    file_name: str | Path | None = None,
-    create_path: bool = False,
-    print_success: bool = True,
-) -> None:
-    """
-    Retrieves all data types from a DataFrame, and stores them in a CSV file. The CSV file will have two columns: 'column_name' and 'dtype'.
+# pandas is only imported where it is needed, so that importing dataframe_utils is cheap:
+if TYPE_CHECKING:
+    import pandas as pd
 
-    Args:
-        df (pd.DataFrame): The DataFrame to store the dtypes of.
-        full_path (str | None, optional): A complete path to store the JSON to. Used instead of both 'directory_path' and 'file_name', and overrides them if provided. Defaults to None.
-        directory_path (str | Path, optional): Path to the directory to store the JSON to. Must be provided alongside 'file_name'. Defaults to '', which results storing to current working directory.
-        file_name (str | None, optional): File name. Must be provided alongside 'directory_path'. Defaults to None. Cannot be empty string if not using 'full_path'.
-        create_path (bool, optional): Creates the specified directories if they currently do not exists. Defaults to False.
-        print_success (bool, optional): Print a success message. Defaults to True.
 
-    Raises:
-        ValueError: Either 'full_path', or both 'directory_path' and 'file_name', must be provided.
-        FileNotFoundError: Directory does not exist and function argument 'create_path' is set to False (i.e. no path will be created).
+logger = logging.getLogger(__name__)
+
+
+def _resolve_store_path(
+    full_path: str | Path | None,
+    directory_path: str | Path,
+    file_name: str | Path | None,
+    suffix: str,
+    create_path: bool,
+) -> Path:
+    """
+    Create the path to store a file to from either 'full_path', or 'directory_path' and 'file_name' (adding `suffix` if missing), 
+    and make sure the parent directory exists.
     """
     # Check that either full_path, or directory_path and file_name, are provided:
     if not full_path and (not directory_path or not file_name):
@@ -43,12 +49,12 @@ def store_dtypes_as_csv(
         if not file_name:
             raise ValueError("File name cannot be empty.")
         if isinstance(file_name, str):
-            file_name = file_name if file_name.endswith(".csv") else file_name + ".csv"
+            file_name = file_name if file_name.endswith(suffix) else file_name + suffix
         elif isinstance(file_name, Path):
             file_name = (
                 file_name
-                if file_name.suffix == ".csv"
-                else file_name.with_suffix(".csv")
+                if file_name.suffix == suffix
+                else file_name.with_suffix(suffix)
             )
 
         # Ensure directory_path is not None
@@ -59,96 +65,624 @@ def store_dtypes_as_csv(
     # Check that the parent directory exists, and create it if it doesn't:
     parent = path.parent
     if not parent.exists() and create_path:
-        parent.mkdir(parents=True)
+        parent.mkdir(parents=True, exist_ok=True)
     elif not parent.exists():
         raise FileNotFoundError(f"Directory '{str(parent.resolve())}' does not exist.")
 
-    # Create a df of all dtypes:
-    dtype_df = df.dtypes.to_frame("dtype").reset_index()  # Make a df of all dtypes
+    return path
 
-    # Store dtype df as CSV:
-    dtype_df.to_csv(path, index=False)
 
-    # Print success message:
-    if print_success:
-        print(f"File '{file_name}' saved to path '{str(path.resolve())}'.")
 
+@instrumented('columns')
+def store_dtypes_as_csv(
+    df: pd.DataFrame,
+    full_path: str | Path | None = None,
+    directory_path: str | Path = "",
+    file_name: str | Path | None = None,
+    create_path: bool = False,
+    print_success: bool = False,
+    fsync: bool = False,
+) -> Path:
+    """
+    Retrieves all data types from a DataFrame, and stores them in a CSV file. The CSV file will have two columns: the column names, and 'dtype'.
+
+    The file is written atomically (see `atomic_path`), and a message is logged to the 'vegetable_patch.dataframe_utils.utils' logger at level INFO.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to store the dtypes of.
+        full_path (str | Path | None, optional): A complete path to store the CSV to. Used instead of both 'directory_path' and 'file_name', and overrides them if provided. Defaults to None.
+        directory_path (str | Path, optional): Path to the directory to store the CSV to. Must be provided alongside 'file_name'. Defaults to '', which results storing to current working directory.
+        file_name (str | None, optional): File name. Must be provided alongside 'directory_path'. Defaults to None. Cannot be empty string if not using 'full_path'.
+        create_path (bool, optional): Creates the specified directories if they currently do not exists. Defaults to False.
+        print_success (bool, optional): Also print a success message. Use the returned path or logging instead. Defaults to False.
+        fsync (bool, optional): Flush the file to disk before returning. Defaults to False.
+
+    Raises:
+        ValueError: Either 'full_path', or both 'directory_path' and 'file_name', must be provided.
+        FileNotFoundError: Directory does not exist and function argument 'create_path' is set to False (i.e. no path will be created).
+
+    Returns:
+        Path: Path to the stored file.
+    """
+    path = _resolve_store_path(full_path, directory_path, file_name, ".csv", create_path)
 
+    _write_dtypes({column: str(dtype) for column, dtype in df.dtypes.items()}, path, "csv", fsync)
 
+    _report_stored(path, print_success)
+    return path
+
+
+
+@instrumented('columns')
 def store_dtypes_as_json(
     df: pd.DataFrame,
-    full_path: str | None = None,
+    full_path: str | Path | None = None,
     directory_path: str | Path = "",
     file_name: str | Path | None = None,
     create_path: bool = False,
-    print_success: bool = True,
-) -> None:
+    print_success: bool = False,
+    fsync: bool = False,
+) -> Path:
     """
-    Retrieves all data types from a DataFrame, and stores them in a CSV file. The CSV file will have two columns: 'column_name' and 'dtype'.
+    Retrieves all data types from a DataFrame, and stores them in a JSON file, with column names as keys and dtypes as values.
+
+    The file is written atomically (see `atomic_path`), and a message is logged to the 'vegetable_patch.dataframe_utils.utils' logger at level INFO.
 
     Args:
         df (pd.DataFrame): The DataFrame to store the dtypes of.
-        full_path (str | None, optional): A complete path to store the JSON to. Used instead of both 'directory_path' and 'file_name', and overrides them if provided. Defaults to None.
+        full_path (str | Path | None, optional): A complete path to store the JSON to. Used instead of both 'directory_path' and 'file_name', and overrides them if provided. Defaults to None.
         directory_path (str | Path, optional): Path to the directory to store the JSON to. Must be provided alongside 'file_name'. Defaults to '', which results storing to current working directory.
         file_name (str | None, optional): File name. Must be provided alongside 'directory_path'. Defaults to None. Cannot be empty string if not using 'full_path'.
         create_path (bool, optional): Creates the specified directories if they currently do not exists. Defaults to False.
-        print_success (bool, optional): Print a success message. Defaults to True.
+        print_success (bool, optional): Also print a success message. Use the returned path or logging instead. Defaults to False.
+        fsync (bool, optional): Flush the file to disk before returning. Defaults to False.
 
     Raises:
         ValueError: Either 'full_path', or both 'directory_path' and 'file_name', must be provided.
         FileNotFoundError: Directory does not exist and function argument 'create_path' is set to False (i.e. no path will be created).
+
+    Returns:
+        Path: Path to the stored file.
     """
-    # Check that either full_path, or directory_path and file_name, are provided:
-    if not full_path and (not directory_path or not file_name):
-        raise ValueError(
-            "Either 'full_path', or 'directory_path' and 'file_name', must be provided."
-        )
+    path = _resolve_store_path(full_path, directory_path, file_name, ".json", create_path)
 
-    # Create a full path if full_path is provided, otherwise use directory_path and file_name:
-    if full_path:
-        path = Path(full_path)
-    else:
-        # Must provide a file name if not using full_path:
-        if not file_name:
-            raise ValueError("File name cannot be empty.")
-        if isinstance(file_name, str):
-            file_name = file_name if file_name.endswith(".csv") else file_name + ".csv"
-        elif isinstance(file_name, Path):
-            file_name = (
-                file_name
-                if file_name.suffix == ".csv"
-                else file_name.with_suffix(".csv")
-            )
+    _write_dtypes({column: str(dtype) for column, dtype in df.dtypes.items()}, path, "json", fsync)
 
-        # Ensure directory_path is not None
-        directory_path = directory_path or ""
-        # Create a full path using directory_path and file_name:
-        path = Path(directory_path) / file_name
+    _report_stored(path, print_success)
+    return path
 
-    # Check that the parent directory exists, and create it if it doesn't:
-    parent = path.parent
-    if not parent.exists() and create_path:
-        parent.mkdir(parents=True)
-    elif not parent.exists():
-        raise FileNotFoundError(f"Directory '{str(parent.resolve())}' does not exist.")
 
-    # Create a df of all dtypes:
-    dtype_df = df.dtypes.to_frame("dtype").reset_index()  # Make a df of all dtypes
-    # Create a dict of the df, with column names as keys and dtypes as values:
-    dtype_dict = dtype_df.set_index("index")["dtype"].astype(str).to_dict()
 
-    # Store dtype dict as JSON:
-    with open(path, "w") as file:
-        file.write(json.dumps(dtype_dict, indent=4))
+def _write_dtypes(dtypes: Mapping[Any, str], path: Path, file_format: str, fsync: bool) -> None:
+    """
+    Store a dtype schema atomically, either as JSON with column names as keys and dtypes as values,
+    or as CSV with the column names in the first column ('index') and the dtypes in the 'dtype' column.
+    """
+    if file_format == "json":
+        with atomic_write(path, fsync=fsync) as file:
+            file.write(json.dumps(dict(dtypes), indent=4))
+        return
+
+    # Same format as `df.dtypes.to_frame("dtype").reset_index().to_csv(index=False)`:
+    with atomic_write(path, fsync=fsync, newline="") as file:
+        writer = csv.writer(file, lineterminator=os.linesep)
+        writer.writerow(["index", "dtype"])
+        writer.writerows(dtypes.items())
+
+
 
+def _report_stored(path: Path, print_success: bool) -> None:
+    """
+    Log (and optionally print) that a file was stored.
+    """
+    message = f"File '{path.name}' saved to path '{str(path.resolve())}'."
+    logger.info(message)
     if print_success:
-        print(f"File '{file_name}' saved to path '{str(path.resolve())}'.")
+        print(message)
+
+
+
+@instrumented('bytes')
+def load_dtypes(path: str | Path) -> dict[str, str]:
+    """
+    Load a dtype schema stored by `store_dtypes_as_json` or `store_dtypes_as_csv`.
+
+    Args:
+        path (str | Path): Path to the schema. Files with the suffix '.json' are read as JSON, all other files as CSV.
+
+    Raises:
+        FileNotFoundError: The file does not exist.
+
+    Returns:
+        dict[str, str]: Column names as keys and dtypes as values.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"No file with path '{path}'.")
+
+    if path.suffix == ".json":
+        with open(path) as file:
+            return {str(column): str(dtype) for column, dtype in json.load(file).items()}
+
+    # The CSV has a header, and column names in the first column and dtypes in the 'dtype' column:
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        dtype_index = header.index("dtype")
+        return {row[0]: row[dtype_index] for row in reader}
+
+
+
+@instrumented('bytes')
+def read_csv_with_dtypes(
+    read_path: str | Path,
+    dtypes: str | Path | Mapping[str, str],
+    use_pyarrow: bool = False,
+    **read_csv_kwargs: Any,
+) -> pd.DataFrame:
+    """
+    Read a CSV with a stored dtype schema, so pandas does not have to infer the dtypes.
+
+    Datetime columns are passed to `parse_dates` (and converted to the stored resolution), timedelta columns are converted with
+    `pd.to_timedelta` after reading, and all other columns are passed to `dtype`.
+
+    Args:
+        read_path (str | Path): Path to the CSV.
+        dtypes (str | Path | Mapping[str, str]): Path to a schema stored by `store_dtypes_as_json` or `store_dtypes_as_csv`, or the schema itself.
+        use_pyarrow (bool, optional): Use the pyarrow engine, which reads large files multithreaded. Requires pyarrow. Defaults to False.
+        **read_csv_kwargs: Passed on to `pd.read_csv`.
+
+    Returns:
+        pd.DataFrame: The data frame with the stored dtypes.
+    """
+    import pandas as pd
+
+    if not isinstance(dtypes, Mapping):
+        dtypes = load_dtypes(dtypes)
+
+    # pandas raises for columns in `parse_dates` that are not read, so only pass the schema of the columns in `usecols`:
+    usecols = read_csv_kwargs.get("usecols")
+    if usecols is not None:
+        if callable(usecols):
+            dtypes = {column: dtype for column, dtype in dtypes.items() if usecols(column)}
+        else:
+            usecols = list(usecols)
+            if any(not isinstance(column, str) for column in usecols):
+                # Column positions, so read the header to get their names:
+                header_kwargs = {key: value for key, value in read_csv_kwargs.items() if key not in ("engine", "chunksize", "iterator", "nrows")}
+                usecols = pd.read_csv(read_path, nrows=0, **header_kwargs).columns
+            used_columns = set(usecols)
+            dtypes = {column: dtype for column, dtype in dtypes.items() if column in used_columns}
+
+    date_dtypes = {column: dtype for column, dtype in dtypes.items() if dtype.startswith("datetime64")}
+    # pandas cannot parse timedeltas while reading, so they are read as strings and converted afterwards:
+    timedelta_dtypes = {column: dtype for column, dtype in dtypes.items() if dtype.startswith("timedelta64")}
+    other_dtypes = {
+        column: "str" if column in timedelta_dtypes else dtype
+        for column, dtype in dtypes.items() if column not in date_dtypes
+    }
+
+    if use_pyarrow:
+        read_csv_kwargs.setdefault("engine", "pyarrow")
+    df = pd.read_csv(read_path, dtype=other_dtypes, parse_dates=list(date_dtypes) or None, **read_csv_kwargs)
+
+    for column, dtype in date_dtypes.items():
+        if column in df.columns and str(df[column].dtype) != dtype:
+            df[column] = df[column].astype(dtype)
+    for column, dtype in timedelta_dtypes.items():
+        if column in df.columns:
+            df[column] = pd.to_timedelta(df[column]).astype(dtype)
+
+    return df
+
+
+
+_EXCEL_STREAMING_SUFFIXES = (".xlsx", ".xlsm")
+
+
+
+class DtypeInference(NamedTuple):
+    """
+    Result of `infer_dtypes`.
+
+    Attributes:
+        dtypes (dict[str, str]): Column names as keys and the merged dtypes of all chunks as values.
+        conflicts (dict[str, list[str]]): Columns that got different dtypes in different chunks, with the dtypes in the order they were seen.
+        n_rows (int): Number of rows that were scanned.
+    """
+    dtypes: dict[str, str]
+    conflicts: dict[str, list[str]]
+    n_rows: int
+
+
+
+def _merge_dtype(dtype: Any, other: Any) -> Any:
+    """
+    Merge the dtypes of a column in two chunks: numeric dtypes are promoted (e.g. int64 and float64 to float64), anything else falls back to object.
+    """
+    import numpy as np
+
+    if dtype == other:
+        return dtype
+    if isinstance(dtype, np.dtype) and isinstance(other, np.dtype) and dtype.kind in "iuf" and other.kind in "iuf":
+        return np.result_type(dtype, other)
+    return np.dtype(object)
+
+
+
+def _iter_file_chunks(read_path: Path, chunk_size: int, sheet_name: str | int, read_csv_kwargs: dict[str, Any]) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV or .xlsx file as DataFrames of at most `chunk_size` rows.
+    """
+    import pandas as pd
+
+    suffix = read_path.suffix.lower()
+    if suffix in _EXCEL_STREAMING_SUFFIXES:
+        yield from _iter_sheet_chunks(read_path, sheet_name, chunk_size)
+        return
+    if suffix in (".xls", ".xlsb", ".ods"):
+        raise ValueError(f"Only .xlsx and .xlsm workbooks can be read in chunks, currently '{read_path.name}'.")
+
+    with pd.read_csv(read_path, chunksize=chunk_size, **read_csv_kwargs) as reader:
+        yield from reader
+
+
+
+@instrumented('bytes')
+def infer_dtypes(
+    read_path: str | Path,
+    chunk_size: int = 100_000,
+    max_rows: int | None = None,
+    sheet_name: str | int = 0,
+    **read_csv_kwargs: Any,
+) -> DtypeInference:
+    """
+    Infer the dtype schema of a CSV or Excel file without reading it into memory at once, e.g. for files larger than RAM.
+
+    The file is read in chunks of `chunk_size` rows, and only the dtypes of the chunks are kept, so memory is bounded by the chunk size.
+    The dtypes of the chunks are merged per column: integers and floats are promoted (e.g. an integer column with missing values in a later chunk
+    becomes float64, as it would when reading the whole file), and other differences fall back to object. Chunks where a column is
+    entirely missing do not count. Columns whose dtype differed between chunks are reported in `conflicts`.
+
+    Example:
+        inference = infer_dtypes('huge.csv', sep=';')
+        if inference.conflicts:
+            ...
+        df = read_csv_with_dtypes('huge.csv', inference.dtypes, sep=';')
+
+    Args:
+        read_path (str | Path): Path to a CSV, or an .xlsx or .xlsm file (read with openpyxl in read-only mode).
+        chunk_size (int, optional): Number of rows per chunk. Defaults to 100_000.
+        max_rows (int | None, optional): Stop after the chunk that reaches `max_rows` rows, to get a quick estimate of the schema.
+            Defaults to None, which scans all rows.
+        sheet_name (str | int, optional): Name or position of the sheet for Excel files. Defaults to 0, the first sheet.
+        **read_csv_kwargs: Passed on to `pd.read_csv` for CSV files, e.g. `sep`, `usecols` or `parse_dates`.
+
+    Raises:
+        ValueError: `chunk_size` is not positive.
+        ValueError: The file is an Excel format that cannot be read in chunks (e.g. .xls).
+        FileNotFoundError: The file does not exist.
+
+    Returns:
+        DtypeInference: The merged dtypes, the conflicting columns, and the number of scanned rows.
+    """
+    import numpy as np
+
+    if chunk_size <= 0:
+        raise ValueError(f"`chunk_size` must be positive, currently {chunk_size=}.")
+    read_path = Path(read_path)
+    if not read_path.exists():
+        raise FileNotFoundError(f"No file with path '{read_path}'.")
+
+    dtypes: dict[Any, Any] = {}
+    first_dtypes: dict[Any, Any] = {}
+    seen: dict[Any, list[str]] = {}
+    missing_chunks: set[Any] = set()  # Columns that are entirely missing in at least one chunk
+    n_rows = 0
+    for chunk in _iter_file_chunks(read_path, chunk_size, sheet_name, read_csv_kwargs):
+        all_missing = chunk.isna().all()
+        for column, dtype in chunk.dtypes.items():
+            first_dtypes.setdefault(column, dtype)
+            if not len(chunk):
+                continue
+            if all_missing[column]:
+                missing_chunks.add(column)
+                continue
+            dtypes[column] = dtype if column not in dtypes else _merge_dtype(dtypes[column], dtype)
+            dtype_names = seen.setdefault(column, [])
+            if str(dtype) not in dtype_names:
+                dtype_names.append(str(dtype))
+
+        n_rows += len(chunk)
+        if max_rows is not None and n_rows >= max_rows:
+            break
+
+    # Integer and boolean columns with missing values become float64 and object when read at once:
+    for column in missing_chunks & dtypes.keys():
+        dtype = dtypes[column]
+        if getattr(dtype, "kind", None) in ("i", "u", "b"):
+            dtypes[column] = _merge_dtype(dtype, np.dtype("float64" if dtype.kind != "b" else object))
+
+    # Columns that are missing in all chunks are float64 when read at once (but object in chunks read from Excel):
+    for column, dtype in first_dtypes.items():
+        if column not in dtypes:
+            dtypes[column] = np.dtype("float64") if dtype == object else dtype
+
+    return DtypeInference(
+        dtypes={column: str(dtypes[column]) for column in first_dtypes},
+        conflicts={column: dtype_names for column, dtype_names in seen.items() if len(dtype_names) > 1},
+        n_rows=n_rows,
+    )
+
+
+
+@instrumented('bytes')
+def store_dtypes_from_file(
+    read_path: str | Path,
+    full_path: str | Path | None = None,
+    directory_path: str | Path = "",
+    file_name: str | Path | None = None,
+    create_path: bool = False,
+    file_format: str = "json",
+    chunk_size: int = 100_000,
+    max_rows: int | None = None,
+    sheet_name: str | int = 0,
+    fsync: bool = False,
+    **read_csv_kwargs: Any,
+) -> tuple[Path, DtypeInference]:
+    """
+    Infer the dtype schema of a CSV or Excel file in chunks with `infer_dtypes`, and store it like `store_dtypes_as_json` or `store_dtypes_as_csv`,
+    without reading the whole file into memory. Columns with conflicting dtypes are logged as a warning.
+
+    Args:
+        read_path (str | Path): Path to a CSV, or an .xlsx or .xlsm file.
+        full_path (str | Path | None, optional): See `store_dtypes_as_json`. Defaults to None.
+        directory_path (str | Path, optional): See `store_dtypes_as_json`. Defaults to ''.
+        file_name (str | Path | None, optional): See `store_dtypes_as_json`. Defaults to None.
+        create_path (bool, optional): See `store_dtypes_as_json`. Defaults to False.
+        file_format (str, optional): Choose; 'json' or 'csv'. Defaults to 'json'.
+        chunk_size (int, optional): See `infer_dtypes`. Defaults to 100_000.
+        max_rows (int | None, optional): See `infer_dtypes`. Defaults to None.
+        sheet_name (str | int, optional): See `infer_dtypes`. Defaults to 0.
+        fsync (bool, optional): See `store_dtypes_as_json`. Defaults to False.
+        **read_csv_kwargs: Passed on to `pd.read_csv` for CSV files.
+
+    Raises:
+        ValueError: `file_format` is not 'json' or 'csv'.
+        ValueError: Same as `infer_dtypes` and `store_dtypes_as_json`.
+        FileNotFoundError: Same as `infer_dtypes` and `store_dtypes_as_json`.
+
+    Returns:
+        tuple[Path, DtypeInference]: Path to the stored schema, and the inferred dtypes with the conflicting columns.
+    """
+    if file_format not in ("json", "csv"):
+        raise ValueError(f"File format must be one of ('json', 'csv'), currently {file_format=}.")
+    path = _resolve_store_path(full_path, directory_path, file_name, f".{file_format}", create_path)
+
+    inference = infer_dtypes(read_path, chunk_size=chunk_size, max_rows=max_rows, sheet_name=sheet_name, **read_csv_kwargs)
+    if inference.conflicts:
+        logger.warning(f"Columns with conflicting dtypes between chunks of '{Path(read_path).name}': {inference.conflicts}.")
+
+    _write_dtypes(inference.dtypes, path, file_format, fsync)
+    _report_stored(path, False)
+    return path, inference
+
+
+
+_SIGNED_INTEGER_DTYPES = ("int8", "int16", "int32", "int64")
+_UNSIGNED_INTEGER_DTYPES = ("uint8", "uint16", "uint32", "uint64")
+
+
+
+def _smallest_integer_dtype(series: pd.Series, allow_unsigned: bool) -> str | None:
+    """
+    Return the smallest integer dtype that holds all values of an integer Series, or None if the Series is empty or all missing.
+    Nullable Series get the nullable dtype (e.g. 'Int8').
+    """
+    import numpy as np
+    import pandas as pd
+
+    min_value, max_value = series.min(), series.max()
+    if pd.isna(min_value):
+        return None
+
+    candidates = _UNSIGNED_INTEGER_DTYPES if allow_unsigned and min_value >= 0 else _SIGNED_INTEGER_DTYPES
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= min_value and max_value <= info.max:
+            if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+                return dtype.capitalize() if dtype.startswith("int") else "UInt" + dtype[4:]
+            return dtype
+    return None
+
+
+
+def _is_float32_exact(series: pd.Series) -> bool:
+    """
+    Check if all values of a float Series can be stored as float32 without losing precision.
+    """
+    import numpy as np
+
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    with np.errstate(over="ignore"):
+        return np.array_equal(values.astype("float32").astype("float64"), values, equal_nan=True)
+
+
+
+@instrumented('rows')
+def optimize_dtypes(
+    df: pd.DataFrame,
+    category_threshold: float = 0.5,
+    allow_unsigned: bool = False,
+    dtypes_path: str | Path | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Reduce the memory usage of a DataFrame by downcasting numeric columns and converting low-cardinality text columns to 'category'.
+
+    Integer columns get the smallest integer type that holds all values, and float64 columns become float32 only if no value loses precision. 
+    Text columns (object or string dtype) with at most `category_threshold` unique values per row become 'category'.
+
+    Args:
+        df (pd.DataFrame): The DataFrame to optimize. It is not modified.
+        category_threshold (float, optional): Maximum ratio of unique values to rows for converting a text column to 'category'. 
+            Set to 0 to never convert. Defaults to 0.5.
+        allow_unsigned (bool, optional): Use unsigned integer types for integer columns without negative values. Defaults to False.
+        dtypes_path (str | Path | None, optional): Store the optimized dtypes with `store_dtypes_as_json` to this path, 
+            so they can be reused with `read_csv_with_dtypes`. Defaults to None.
+
+    Raises:
+        ValueError: `category_threshold` is not between 0 and 1.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: The optimized DataFrame, and a report with the columns 'dtype_before', 'dtype_after', 
+            'memory_before' and 'memory_after' (bytes, from `memory_usage(deep=True)`), indexed by column name.
+    """
+    import pandas as pd
+
+    if not 0 <= category_threshold <= 1:
+        raise ValueError(f"`category_threshold` must be between 0 and 1, currently {category_threshold=}.")
+
+    new_dtypes = {}
+    for column, series in df.items():
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            continue
+        elif pd.api.types.is_integer_dtype(dtype):
+            new_dtype = _smallest_integer_dtype(series, allow_unsigned)
+        elif pd.api.types.is_float_dtype(dtype):
+            # Only 64-bit floats are downcast, smaller floats (e.g. float16) are kept:
+            float32 = {"float64": "float32", "Float64": "Float32"}.get(str(dtype))
+            new_dtype = float32 if float32 and _is_float32_exact(series) else None
+        elif (pd.api.types.is_object_dtype(dtype) or isinstance(dtype, pd.StringDtype)) and len(series):
+            try:
+                n_unique = series.nunique()
+            except TypeError:  # Unhashable values, e.g. lists
+                continue
+            # All-missing columns have nothing to encode, and would otherwise pass any threshold, including 0:
+            new_dtype = "category" if n_unique and n_unique / len(series) <= category_threshold else None
+        else:
+            continue
+
+        if new_dtype is not None and new_dtype != str(dtype):
+            new_dtypes[column] = new_dtype
+
+    optimized_df = df.astype(new_dtypes) if new_dtypes else df.copy(deep=False)
+
+    report = pd.DataFrame({
+        "dtype_before": df.dtypes.astype(str),
+        "dtype_after": optimized_df.dtypes.astype(str),
+        "memory_before": df.memory_usage(deep=True, index=False),
+        "memory_after": optimized_df.memory_usage(deep=True, index=False),
+    })
+
+    if dtypes_path is not None:
+        store_dtypes_as_json(optimized_df, full_path=str(dtypes_path), create_path=True, print_success=False)
+
+    return optimized_df, report
+
 
 
+def _apply_to_strings(transform: Callable[[str], str], values: Sequence[Any]) -> list[Any]:
+    """
+    Apply `transform` to all strings in `values`, leaving other values (e.g. numbers) as they are.
+    """
+    return [transform(value) if isinstance(value, str) else value for value in values]
+
+
+
+@instrumented('rows')
+def normalize_string_columns(
+    df: pd.DataFrame,
+    transform: Callable[[str], str] | Mapping[str, Any],
+    columns: Iterable[str] | None = None,
+    max_workers: int | None = None,
+    parallel_threshold: int = 500_000,
+) -> pd.DataFrame:
+    """
+    Apply a string transform, e.g. a `format_string` configuration or a date normalization, to text columns of a DataFrame.
+
+    Each column is factorized, so the transform is only applied once per unique value and the results are mapped back to the rows. 
+    The cost therefore depends on the number of unique values rather than the number of rows.
+
+    Example:
+        normalize_string_columns(df, {'sep': '_', 'case_to': 'lower'})
+        normalize_string_columns(df, DateNormalizer(), columns=['sampling_date'], max_workers=8)
+
+    Args:
+        df (pd.DataFrame): The DataFrame to normalize. It is not modified.
+        transform (Callable[[str], str] | Mapping[str, Any]): Function applied to each unique string, e.g. a `StringFormatter`, `DateNormalizer` 
+            or `CaseInsensitiveReplacer` from `string_utils`, or keyword arguments for a `StringFormatter`. Must be picklable if `max_workers` is used.
+        columns (Iterable[str] | None, optional): Columns to normalize. Defaults to None, which normalizes all object, string and category columns.
+        max_workers (int | None, optional): Split the unique values of large columns across a process pool of this size. Defaults to None, which does all work in the current process.
+        parallel_threshold (int, optional): Minimum number of unique values in a column for it to be split across the process pool. 
+            Sending values to the workers has a cost, so the pool mostly pays off for expensive transforms. Defaults to 500 000.
+
+    Raises:
+        ValueError: A column is not in the DataFrame.
+
+    Returns:
+        pd.DataFrame: A copy of the DataFrame with the normalized columns. Values that are not strings, e.g. missing values, are left as they are.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(transform, Mapping):
+        from ..string_utils import StringFormatter
+        transform = StringFormatter(**transform)
+
+    if columns is None:
+        columns = [
+            column for column, dtype in df.dtypes.items()
+            if pd.api.types.is_object_dtype(dtype) or isinstance(dtype, (pd.StringDtype, pd.CategoricalDtype))
+        ]
+    else:
+        columns = list(columns)
+        for column in columns:
+            if column not in df.columns:
+                raise ValueError(f"Column '{column}' not in DataFrame.")
+
+    normalized_df = df.copy(deep=False)
+    executor = None
+    try:
+        for column in columns:
+            series = df[column]
+            codes, uniques = pd.factorize(series)
+            uniques = np.asarray(uniques, dtype=object)
+
+            if max_workers and max_workers > 1 and len(uniques) >= parallel_threshold:
+                if executor is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    executor = ProcessPoolExecutor(max_workers=max_workers)
+                batches = np.array_split(uniques, max_workers * 4)
+                normalized_uniques = [
+                    value for batch in executor.map(_apply_to_strings, [transform] * len(batches), batches) for value in batch
+                ]
+            else:
+                normalized_uniques = _apply_to_strings(transform, uniques)
+
+            values = np.asarray(normalized_uniques, dtype=object).take(codes)
+            # Missing values have code -1, and keep their original value:
+            missing = codes < 0
+            if missing.any():
+                values[missing] = series.to_numpy(dtype=object)[missing]
+
+            normalized = pd.Series(values, index=series.index, name=column)
+            if isinstance(series.dtype, (pd.StringDtype, pd.CategoricalDtype)):
+                normalized = normalized.astype(series.dtype if isinstance(series.dtype, pd.StringDtype) else "category")
+            normalized_df[column] = normalized
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return normalized_df
+
 
+
+@instrumented('columns')
 def set_column_order(df:pd.DataFrame, column_to_move:str, after_column:str) -> pd.DataFrame:
     """
     Reorder the columns in a data frame to have a specified column after another specified column.
+    Use `reorder_columns` to move several columns at once.
 
     Args:
         df (pd.DataFrame): Data frame to reorder columns in.
@@ -162,36 +696,666 @@ def set_column_order(df:pd.DataFrame, column_to_move:str, after_column:str) -> p
     Returns:
         pd.DataFrame: Original data frame with the columns in the new order.
     """
-    
-    if column_to_move not in df.columns:
-        raise ValueError(f"Column '{column_to_move}' not in DataFrame.")
-    if after_column not in df.columns:
-        raise ValueError(f"Column '{after_column}' not in DataFrame.")
+    return reorder_columns(df, moves=[(column_to_move, after_column)])
+
+
+
+def _contiguous_runs(positions: Sequence[int]) -> list[slice]:
+    """
+    Split a sequence of column positions into slices of consecutive positions, e.g. [0, 1, 5, 2, 3] -> [0:2, 5:6, 2:4].
+    """
+    runs = []
+    start = previous = None
+    for position in positions:
+        if start is None:
+            start = previous = position
+        elif position == previous + 1:
+            previous = position
+        else:
+            runs.append(slice(start, previous + 1))
+            start = previous = position
+    if start is not None:
+        runs.append(slice(start, previous + 1))
+    return runs
+
+
+
+@instrumented('columns')
+def reorder_columns(
+    df: pd.DataFrame,
+    moves: Iterable[tuple[str, str]] | Mapping[str, str] | None = None,
+    order: Sequence[str] | None = None,
+    copy: bool = True,
+) -> pd.DataFrame:
+    """
+    Reorder several columns at once, and apply the new order to the data frame in a single step.
+
+    The final order is worked out in linear time: `order` is applied first, and then each move in `moves` 
+    in turn, with the same result as calling `set_column_order` once per move.
+
+    Example:
+        reorder_columns(df, order=['id', 'name'], moves=[('weight', 'height'), ('comment', 'weight')])
+
+    Args:
+        df (pd.DataFrame): Data frame to reorder columns in.
+        moves (Iterable[tuple[str, str]] | Mapping[str, str] | None, optional): Pairs of (column to move, column to insert it after). Defaults to None.
+        order (Sequence[str] | None, optional): Columns to put first, in this order. The other columns keep their current order after them. Defaults to None.
+        copy (bool, optional): Copy the data into the new column order. With False, the result is built from slices of the original data 
+            without copying it, which is much faster for large frames (pandas copies lazily on write). Defaults to True.
+
+    Raises:
+        ValueError: If the data frame has duplicate column names.
+        ValueError: If a column in `moves` or `order` is not in the data frame.
+        ValueError: If a column is moved after itself, or is given more than once in `order`.
+
+    Returns:
+        pd.DataFrame: Original data frame with the columns in the new order.
+    """
+    import pandas as pd
+
+    if not df.columns.is_unique:
+        raise ValueError("Cannot reorder a DataFrame with duplicate column names.")
 
     columns = list(df.columns)
-    columns.remove(column_to_move)
-    after_column_index = columns.index(after_column)
-    columns.insert(after_column_index + 1, column_to_move)
-    
-    return df[columns]
+
+    if order is not None:
+        order = list(order)
+        order_set = set(order)
+        if len(order_set) != len(order):
+            raise ValueError("Columns in `order` must be unique.")
+        for column in order:
+            if column not in df.columns:
+                raise ValueError(f"Column '{column}' not in DataFrame.")
+        columns = order + [column for column in columns if column not in order_set]
+
+    if moves is not None and columns:
+        if isinstance(moves, Mapping):
+            moves = moves.items()
+
+        # Doubly linked list of columns, so that each move is done in constant time:
+        next_column = dict(zip(columns, columns[1:] + [None]))
+        previous_column = dict(zip(columns, [None] + columns[:-1]))
+        first_column = columns[0]
+
+        for column_to_move, after_column in moves:
+            if column_to_move not in next_column:
+                raise ValueError(f"Column '{column_to_move}' not in DataFrame.")
+            if after_column not in next_column:
+                raise ValueError(f"Column '{after_column}' not in DataFrame.")
+            if column_to_move == after_column:
+                raise ValueError(f"Cannot move column '{column_to_move}' after itself.")
+
+            # Unlink the column:
+            previous, following = previous_column[column_to_move], next_column[column_to_move]
+            if previous is None:
+                first_column = following
+            else:
+                next_column[previous] = following
+            if following is not None:
+                previous_column[following] = previous
+
+            # Link it in after `after_column`:
+            following = next_column[after_column]
+            next_column[after_column] = column_to_move
+            previous_column[column_to_move] = after_column
+            next_column[column_to_move] = following
+            if following is not None:
+                previous_column[following] = column_to_move
+
+        columns = []
+        column = first_column
+        while column is not None:
+            columns.append(column)
+            column = next_column[column]
+
+    if copy:
+        return df.reindex(columns=columns)
+
+    # Concatenate slices of columns that are still next to each other, which are views of the original data:
+    positions = df.columns.get_indexer(columns)
+    runs = _contiguous_runs(positions)
+    if len(runs) <= 1:
+        return df.iloc[:, runs[0]] if runs else df.iloc[:, :0]
+    concat_kwargs = {"copy": False} if int(pd.__version__.split(".")[0]) < 3 else {}
+    return pd.concat([df.iloc[:, run] for run in runs], axis=1, **concat_kwargs)
+
+
+
+def _header_to_column_names(header:Sequence[Any]) -> list[Any]:
+    """
+    Make column names from a header row like `pd.read_excel` does: empty cells become 'Unnamed: <position>', and duplicate names
+    are renamed to e.g. 'x.1', skipping names that are already in the header, and renaming unnamed columns last.
+    """
+    columns = [f'Unnamed: {i}' if name is None else name for i, name in enumerate(header)]
+    unnamed = [i for i, name in enumerate(header) if name is None]
+    existing = set(columns)
+
+    counts: dict[Any, int] = {}
+    for i in [i for i in range(len(columns)) if header[i] is not None] + unnamed:
+        name = original = columns[i]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[original] = count + 1
+            name = f'{original}.{count}'
+            count = count + 1 if name in existing else counts.get(name, 0)
+        columns[i] = name
+        counts[name] = count + 1
+
+    return columns
+
+
+
+def _trim_row(row:tuple) -> tuple:
+    """
+    Drop the empty cells at the end of a row, like `pd.read_excel` does.
+    """
+    end = len(row)
+    while end and (row[end - 1] is None or row[end - 1] == ''):
+        end -= 1
+    return row[:end]
+
+
+
+def _drop_trailing_empty_rows(rows:Iterable[tuple]) -> Iterator[tuple]:
+    """
+    Yield the (trimmed) rows, except the empty rows at the end of the sheet, like `pd.read_excel` does.
+    Empty rows are only counted until a row with values follows, so a large formatted but empty range is not held in memory.
+    """
+    n_empty = 0
+    for row in rows:
+        if not row:
+            n_empty += 1
+            continue
+        yield from itertools.repeat((), n_empty)
+        n_empty = 0
+        yield row
+
+
+
+def _iter_sheet_chunks(read_path:Path, sheet:str | int, chunk_size:int) -> Iterator[pd.DataFrame]:
+    """
+    Read a sheet (by name or position) in an .xlsx file as DataFrames of at most `chunk_size` rows, using openpyxl in read-only mode.
+    The first row is used as header, and at least one (possibly empty) DataFrame is always yielded.
+
+    Empty cells at the end of rows, and empty rows at the end of the sheet, are dropped like `pd.read_excel` does, so formatted but
+    empty cells do not add columns or rows. The number of columns is that of the longest row among the header and the first chunk.
+
+    Raises:
+        ValueError: A row after the first chunk has values beyond the columns of the header and the first chunk.
+    """
+    import openpyxl
+    import pandas as pd
+
+    workbook = openpyxl.load_workbook(read_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet]
+        rows = _drop_trailing_empty_rows(_trim_row(row) for row in worksheet.iter_rows(values_only=True))
+        header = next(rows, ())
+        first_rows = list(itertools.islice(rows, chunk_size))
+        n_columns = max((len(row) for row in first_rows), default=0)
+        n_columns = max(n_columns, len(header))
+        columns = _header_to_column_names(header + (None,) * (n_columns - len(header)))
+
+        chunk: list[tuple] = []
+        yielded = False
+        for i, row in enumerate(itertools.chain(first_rows, rows), start=2):
+            if len(row) > n_columns:
+                raise ValueError(
+                    f"Row {i} of sheet '{sheet}' in '{read_path}' has values beyond the {n_columns} columns of the header and the first "
+                    f"{chunk_size} rows. Use a larger 'chunk_size', or read the sheet at once."
+                )
+            chunk.append(row + (None,) * (n_columns - len(row)))
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=columns)
+                yielded = True
+                chunk = []
+
+        if chunk or not yielded:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+
+
+_OUTPUT_FORMAT_SUFFIXES = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+_CSV_COMPRESSION_SUFFIXES = {'gzip': '.gz', 'bz2': '.bz2', 'zip': '.zip', 'xz': '.xz', 'zstd': '.zst'}
+_DEFAULT_COMPRESSION = {'csv': None, 'parquet': 'snappy', 'feather': 'lz4'}
+# Maximum number of chunks that are held in memory to find the types of columns that are empty in the first chunks:
+_MAX_HELD_BACK_CHUNKS = 16
+
+
+
+def _write_sheet(chunks:Iterable[pd.DataFrame], write_path:Path, output_format:str, compression:str | None, fsync:bool=False) -> None:
+    """
+    Write the chunks of a sheet to a single file. Parquet files get one row group per chunk, and Feather files one record batch per chunk.
+    The column types of the first chunk are used for the whole file, which is only moved into place once all chunks are written.
+    """
+    with atomic_path(write_path, fsync=fsync) as tmp_path:
+        if output_format == 'csv' and compression == 'zip':
+            _write_zipped_csv_sheet(chunks, tmp_path, write_path.name.removesuffix('.zip'))
+        elif output_format == 'csv':
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(tmp_path, index=False, header=i == 0, mode='w' if i == 0 else 'a', compression=compression)
+        else:
+            _write_arrow_sheet(chunks, tmp_path, write_path.name, output_format, compression)
+
+
+
+def _write_zipped_csv_sheet(chunks:Iterable[pd.DataFrame], write_path:Path, archive_name:str) -> None:
+    """
+    Write the chunks of a sheet to a single CSV file named `archive_name` in a zip archive. Appending chunks with `to_csv` would add
+    a member per chunk, and pandas would name the member after the temporary file, so all chunks are written through one member instead.
+    """
+    import zipfile
+
+    with zipfile.ZipFile(write_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(archive_name, 'w') as member, io.TextIOWrapper(member, encoding='utf-8', newline='') as file:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(file, index=False, header=i == 0)
+
 
 
+def _write_arrow_sheet(chunks:Iterable[pd.DataFrame], write_path:Path, name:str, output_format:str, compression:str | None) -> None:
+    """
+    Write the chunks of a sheet to a Parquet or Feather file with pyarrow. `name` is the final file name, used in errors.
+
+    Columns that are empty in the first chunks have no type yet, so up to `_MAX_HELD_BACK_CHUNKS` chunks are held back until every column
+    has one. Columns that are still empty are stored as strings, and later values of another type raise instead of being cast to strings.
+    """
+    import pyarrow as pa
+
+    writer = None
+    schema = None
+    untyped_columns: list[str] = []
+    held_back: list[pa.Table] = []
+
+    def open_writer(tables:list[pa.Table]) -> None:
+        nonlocal writer, schema
+        fields = []
+        for i, field in enumerate(tables[0].schema):
+            types = [table.schema.field(i).type for table in tables if not pa.types.is_null(table.schema.field(i).type)]
+            if not types:
+                untyped_columns.append(field.name)
+            fields.append(field.with_type(types[0] if types else pa.string()))
+        # The pandas metadata of the last table describes the most columns with values:
+        schema = pa.schema(fields, metadata=tables[-1].schema.metadata)
+
+        if output_format == 'parquet':
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(write_path, schema, compression=compression)
+        else:
+            writer = pa.ipc.new_file(write_path, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+
+    def write(table:pa.Table) -> None:
+        if not table.schema.equals(schema):
+            for column in untyped_columns:
+                column_type = table.schema.field(column).type
+                if not (pa.types.is_null(column_type) or pa.types.is_string(column_type) or pa.types.is_large_string(column_type)):
+                    raise ValueError(
+                        f"Column '{column}' in '{name}' is empty in the first {_MAX_HELD_BACK_CHUNKS} chunks, "
+                        f"so its type is unknown, but has values of type {column_type} later. Use a larger 'chunk_size', or output_format='csv'."
+                    )
+            try:
+                table = table.cast(schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(
+                    f"Column types in '{name}' changed between chunks ({e}). "
+                    "Use a larger 'chunk_size', or output_format='csv'."
+                ) from e
+        writer.write_table(table)
+
+    try:
+        for chunk in chunks:
+            try:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+                # Typically a column with mixed types, e.g. IDs where some cells are text:
+                raise ValueError(
+                    f"A column in '{name}' cannot be converted to a single type ({e}). "
+                    "Clean up the column in the workbook, or use output_format='csv'."
+                ) from e
+
+            if writer is not None:
+                write(table)
+                continue
+
+            held_back.append(table)
+            all_typed = all(
+                any(not pa.types.is_null(table.schema.field(i).type) for table in held_back)
+                for i in range(table.num_columns)
+            )
+            if all_typed or len(held_back) == _MAX_HELD_BACK_CHUNKS:
+                open_writer(held_back)
+                for table in held_back:
+                    write(table)
+                held_back = []
+
+        if writer is None and held_back:
+            open_writer(held_back)
+            for table in held_back:
+                write(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+
+def _extract_sheet(excel:Path | pd.ExcelFile, sheet:str, write_path:Path, chunk_size:int | None, output_format:str, compression:str | None, fsync:bool=False) -> Path:
+    """
+    Read a single sheet and write it to `write_path`, either at once or in chunks of `chunk_size` rows.
+    """
+    import pandas as pd
+
+    if chunk_size:
+        chunks: Iterable[pd.DataFrame] = _iter_sheet_chunks(excel, sheet, chunk_size)
+    else:
+        chunks = [pd.read_excel(excel, sheet_name=sheet)]
+    _write_sheet(chunks, write_path, output_format, compression, fsync)
+
+    return write_path
+
+
+
+def _plan_sheet_extraction(
+    xl_file: pd.ExcelFile,
+    read_path: Path,
+    path_storage_dir: str | Path,
+    file_name_prefix: str,
+    file_name_suffix: str,
+    chunk_size: int | None,
+    output_format: str,
+    compression: str | None,
+    sheet_names: Iterable[str] | None,
+) -> tuple[dict[str, Path], str | None]:
+    """
+    Validate the options of `extract_sheets_from_Excel` for an opened workbook, and return the paths to write by sheet name, and the compression to use.
+    """
+    if chunk_size is not None and chunk_size <= 0:
+        raise ValueError(f"`chunk_size` must be positive, currently {chunk_size=}.")
+    if output_format not in _OUTPUT_FORMAT_SUFFIXES:
+        raise ValueError(f'Output format must be one of {tuple(_OUTPUT_FORMAT_SUFFIXES)}, currently {output_format=}.')
 
-def extract_sheets_from_Excel(read_path:Path, path_storage_dir:Path, file_name_prefix:str='', file_name_suffix:str='') -> None:
-    """Extracts all sheets from an Excel file and saves them as CSVs."""
+    if compression == 'default':
+        compression = _DEFAULT_COMPRESSION[output_format]
+    suffix = _OUTPUT_FORMAT_SUFFIXES[output_format]
+    if output_format == 'csv' and compression:
+        suffix += _CSV_COMPRESSION_SUFFIXES.get(compression, '')
+
+    if sheet_names is None:
+        sheet_names = xl_file.sheet_names
+    else:
+        sheet_names = list(sheet_names)
+        for sheet in sheet_names:
+            if sheet not in xl_file.sheet_names:
+                raise ValueError(f"Sheet '{sheet}' not in Excel file '{read_path}'.")
+    write_paths = {
+        sheet : Path(path_storage_dir) / f'{file_name_prefix}{sheet}{file_name_suffix}{suffix}'
+        for sheet in sheet_names
+    }
+
+    return write_paths, compression
+
+
+
+def _extract_sheets_from_Excel(
+    read_path: str | Path,
+    path_storage_dir: str | Path,
+    file_name_prefix: str,
+    file_name_suffix: str,
+    max_workers: int | None,
+    chunk_size: int | None,
+    output_format: str,
+    compression: str | None,
+    sheet_names: Iterable[str] | None,
+    fsync: bool = False,
+) -> dict[str, Path]:
+    """
+    Implementation of `extract_sheets_from_Excel`, returning the written paths by sheet name.
+    """
+    import pandas as pd
+
+    read_path = Path(read_path)
 
-    # Read all sheets in Excel file:
     with pd.ExcelFile(read_path) as xl_file:
-        xl_sheets = {
-            sheet : pd.read_excel(xl_file, sheet_name=sheet)
-            for sheet in xl_file.sheet_names
-        }
-
-    # Iterate the dict and store dfs in sheets to respective CSV files:
-    for sheet, df in xl_sheets.items():
-        file_name = f'{file_name_prefix}{sheet}{file_name_suffix}.csv'
-        df.to_csv(
-            path_storage_dir / file_name,
-            index=False
+        write_paths, compression = _plan_sheet_extraction(
+            xl_file, read_path, path_storage_dir, file_name_prefix, file_name_suffix, chunk_size, output_format, compression, sheet_names
+        )
+
+        if not max_workers or max_workers == 1 or len(write_paths) < 2:
+            # Read and write one sheet at a time, reusing the already opened workbook unless streaming:
+            for sheet, write_path in write_paths.items():
+                _extract_sheet(read_path if chunk_size else xl_file, sheet, write_path, chunk_size, output_format, compression, fsync)
+            return write_paths
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Each worker opens the workbook itself and extracts a single sheet:
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(write_paths))) as executor:
+        futures = [
+            executor.submit(_extract_sheet, read_path, sheet, write_path, chunk_size, output_format, compression, fsync)
+            for sheet, write_path in write_paths.items()
+        ]
+        for future in futures:
+            future.result()
+
+    return write_paths
+
+
+
+@instrumented('bytes')
+def extract_sheets_from_Excel(
+    read_path: str | Path,
+    path_storage_dir: str | Path,
+    file_name_prefix: str = '',
+    file_name_suffix: str = '',
+    max_workers: int | None = None,
+    chunk_size: int | None = None,
+    output_format: str = 'csv',
+    compression: str | None = 'default',
+    sheet_names: Iterable[str] | None = None,
+    fsync: bool = False,
+) -> list[Path]:
+    """
+    Extracts all sheets from an Excel file and saves them as CSVs, or as Parquet or Feather files.
+
+    Sheets are read and written one at a time, so only one sheet (or one chunk of a sheet) is held in memory per process.
+    Parquet and Feather files keep the column types inferred from the workbook, and are much faster to read back than CSVs.
+    Each file is written atomically (see `atomic_path`), so an interrupted extraction never leaves a partially written file behind.
+
+    Args:
+        read_path (str | Path): Path to the Excel file.
+        path_storage_dir (str | Path): Directory to store the CSV files in.
+        file_name_prefix (str, optional): Prefix of the file names, which are '<prefix><sheet name><suffix>.<format>'. Defaults to ''.
+        file_name_suffix (str, optional): Suffix of the file names. Defaults to ''.
+        max_workers (int | None, optional): Extract the sheets in a process pool of this size. Defaults to None, which extracts the sheets in the current process.
+        chunk_size (int | None, optional): Stream each sheet in chunks of this many rows with openpyxl in read-only mode, for sheets that are too large 
+            to be read at once. Only supported for .xlsx files. Cell values are written as stored in the workbook, and Parquet files get one row group per chunk. 
+            Defaults to None, which reads each sheet at once with `pd.read_excel`.
+        output_format (str, optional): Choose; 'csv', 'parquet' or 'feather'. Parquet and Feather require pyarrow. Defaults to 'csv'.
+        compression (str | None, optional): Compression codec, e.g. 'gzip' for CSV (adds '.gz' to the file names), 'snappy' or 'zstd' for Parquet, 
+            and 'lz4' or 'zstd' for Feather. None for no compression. Defaults to 'default', which is no compression for CSV, 'snappy' for Parquet and 'lz4' for Feather.
+        sheet_names (Iterable[str] | None, optional): Only extract these sheets. Defaults to None, which extracts all sheets.
+        fsync (bool, optional): Flush each file to disk before moving it into place. Defaults to False.
+
+    Raises:
+        ValueError: `chunk_size` is not positive.
+        ValueError: `output_format` is not one of ('csv', 'parquet', 'feather').
+        ValueError: A sheet in `sheet_names` is not in the Excel file.
+        ValueError: Column types changed between chunks in such a way that they cannot be written to a single Parquet or Feather file,
+            e.g. a column only gets values after the first 16 chunks.
+        ValueError: A column has mixed types (e.g. numbers and text) that cannot be written to a Parquet or Feather file. Such columns are
+            not cast to strings, so the column types in the file are always those of the workbook.
+
+    Returns:
+        list[Path]: Paths to the written files, in the order of the sheets.
+    """
+    write_paths = _extract_sheets_from_Excel(
+        read_path, path_storage_dir, file_name_prefix, file_name_suffix, max_workers, chunk_size, output_format, compression, sheet_names, fsync
+    )
+    return list(write_paths.values())
+
+
+
+_MANIFEST_FILE_NAME = '.extract_sheets_manifest.json'
+
+
+
+class ExtractionSummary(NamedTuple):
+    """
+    Result of `extract_sheets_from_Excel_incremental`.
+
+    Attributes:
+        written (list[Path]): Sheet outputs that were (re)written.
+        skipped (list[Path]): Sheet outputs that were already up to date.
+        skipped_workbooks (list[Path]): Workbooks that were not opened, because they and all of their outputs were unchanged.
+    """
+    written: list[Path]
+    skipped: list[Path]
+    skipped_workbooks: list[Path]
+
+
+
+def _file_hash(path: Path) -> str:
+    """
+    SHA-256 hash of the contents of a file, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+
+def _file_record(path: Path) -> dict[str, Any]:
+    """
+    Size, modification time and hash of a file, as stored in the manifest.
+    """
+    stat_result = path.stat()
+    return {'size': stat_result.st_size, 'mtime_ns': stat_result.st_mtime_ns, 'hash': _file_hash(path)}
+
+
+
+def _is_unchanged(path: Path, record: dict[str, Any]) -> bool:
+    """
+    Check a file against its manifest record. The contents are only hashed if the size is the same but the modification time is not,
+    and the record is then updated with the new modification time.
+    """
+    try:
+        stat_result = path.stat()
+    except FileNotFoundError:
+        return False
+    if stat_result.st_size != record['size']:
+        return False
+    if stat_result.st_mtime_ns == record['mtime_ns']:
+        return True
+    if _file_hash(path) != record['hash']:
+        return False
+    record['mtime_ns'] = stat_result.st_mtime_ns
+    return True
+
+
+
+def _store_manifest(manifest: dict[str, Any], manifest_path: Path, fsync: bool = False) -> None:
+    """
+    Store the manifest of `extract_sheets_from_Excel_incremental` atomically, so it is never left half written.
+    """
+    with atomic_write(manifest_path, fsync=fsync) as file:
+        json.dump(manifest, file, indent=4)
+
+
+
+@instrumented('bytes')
+def extract_sheets_from_Excel_incremental(
+    read_paths: str | Path | Iterable[str | Path],
+    path_storage_dir: str | Path,
+    file_name_prefix: str = '',
+    file_name_suffix: str = '',
+    max_workers: int | None = None,
+    chunk_size: int | None = None,
+    output_format: str = 'csv',
+    compression: str | None = 'default',
+    manifest_path: str | Path | None = None,
+    fsync: bool = False,
+) -> ExtractionSummary:
+    """
+    Extract the sheets of one or more Excel files like `extract_sheets_from_Excel`, but skip work that was already done in a previous run.
+
+    A manifest in the output directory records the size, modification time and content hash of each workbook, and of each sheet output.
+    Workbooks that are unchanged, and whose outputs are all present and unchanged, are skipped without being opened. For unchanged workbooks
+    with missing or modified outputs, only those sheets are rewritten. Changed workbooks, or workbooks extracted with other options, are extracted in full.
+
+    Args:
+        read_paths (str | Path | Iterable[str | Path]): Path to an Excel file, or several paths.
+        path_storage_dir (str | Path): Directory to store the extracted sheets in.
+        file_name_prefix (str, optional): See `extract_sheets_from_Excel`. Defaults to ''.
+        file_name_suffix (str, optional): See `extract_sheets_from_Excel`. Defaults to ''.
+        max_workers (int | None, optional): See `extract_sheets_from_Excel`. Defaults to None.
+        chunk_size (int | None, optional): See `extract_sheets_from_Excel`. Defaults to None.
+        output_format (str, optional): See `extract_sheets_from_Excel`. Defaults to 'csv'.
+        compression (str | None, optional): See `extract_sheets_from_Excel`. Defaults to 'default'.
+        manifest_path (str | Path | None, optional): Path to the manifest. Defaults to None, which uses '.extract_sheets_manifest.json' in `path_storage_dir`.
+        fsync (bool, optional): See `extract_sheets_from_Excel`. Also applies to the manifest. Defaults to False.
+
+    Raises:
+        ValueError: Same as `extract_sheets_from_Excel`.
+
+    Returns:
+        ExtractionSummary: The sheet outputs that were written and skipped, and the workbooks that were skipped.
+    """
+    read_paths = [read_paths] if isinstance(read_paths, (str, Path)) else list(read_paths)
+    path_storage_dir = Path(path_storage_dir)
+    manifest_path = path_storage_dir / _MANIFEST_FILE_NAME if manifest_path is None else Path(manifest_path)
+
+    manifest: dict[str, Any] = {'workbooks': {}}
+    if manifest_path.exists():
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+
+    # Options that change the outputs; a workbook extracted with other options is extracted again:
+    options = {
+        'path_storage_dir': str(path_storage_dir.resolve()),
+        'file_name_prefix': file_name_prefix,
+        'file_name_suffix': file_name_suffix,
+        'chunked': bool(chunk_size),
+        'output_format': output_format,
+        'compression': compression,
+    }
+
+    summary = ExtractionSummary([], [], [])
+    for read_path in read_paths:
+        read_path = Path(read_path)
+        key = str(read_path.resolve())
+        record = manifest['workbooks'].get(key)
+
+        if record is not None and record['options'] == options and _is_unchanged(read_path, record['workbook']):
+            stale_sheets = [
+                sheet for sheet, output in record['sheets'].items()
+                if not _is_unchanged(path_storage_dir / output['path'], output)
+            ]
+            up_to_date = [path_storage_dir / output['path'] for sheet, output in record['sheets'].items() if sheet not in stale_sheets]
+            summary.skipped.extend(up_to_date)
+            if not stale_sheets:
+                summary.skipped_workbooks.append(read_path)
+                continue
+        else:
+            stale_sheets = None
+            record = {'workbook': _file_record(read_path), 'options': options, 'sheets': {}}
+
+        write_paths = _extract_sheets_from_Excel(
+            read_path, path_storage_dir, file_name_prefix, file_name_suffix, max_workers, chunk_size, output_format, compression, stale_sheets, fsync
         )
-    
+        for sheet, write_path in write_paths.items():
+            # Relative to the output directory, so runs from another working directory find the outputs:
+            record['sheets'][sheet] = {'path': str(write_path.relative_to(path_storage_dir)), **_file_record(write_path)}
+        summary.written.extend(write_paths.values())
+
+        # Store the manifest after each extracted workbook, so an interrupted run keeps its progress:
+        manifest['workbooks'][key] = record
+        _store_manifest(manifest, manifest_path, fsync)
+
+    # Also store updated modification times of files that were touched, but not changed:
+    if read_paths:
+        _store_manifest(manifest, manifest_path, fsync)
+
+    return summary
@@ -0,0 +1,156 @@
+"""
+Atomic file writers, and a thread pool for writing many files concurrently.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Callable, Iterator, Optional
+
+
+
+def _fsync_file(path:Path) -> None:
+    """
+    Flush a written file to disk.
+    """
+    with open(path, 'rb') as file:
+        os.fsync(file.fileno())
+
+
+
+def _fsync_directory(directory:Path) -> None:
+    """
+    Flush a directory entry (e.g. a renamed file) to disk. Not possible on all platforms, e.g. Windows, where it is skipped.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+
+@contextmanager
+def atomic_path(path:str | Path, fsync:bool=False) -> Iterator[Path]:
+    """
+    Yield a temporary path next to `path` to write to, and move it into place with `os.replace` when the block exits without errors.
+
+    Readers therefore see either the old file or the complete new file, never a partially written one, and a crash leaves no partial file behind.
+    Use this for writers that need a path, e.g. `df.to_parquet`, and `atomic_write` for writing to a file object.
+
+    Example:
+        with atomic_path('data.parquet') as tmp_path:
+            df.to_parquet(tmp_path)
+
+    Args:
+        path (str | Path): Final path of the file.
+        fsync (bool, optional): Flush the file and its directory entry to disk before returning, so the file survives a power loss. Defaults to False.
+    """
+    path = Path(path)
+    # The temporary file is in the same directory, so that os.replace is atomic:
+    tmp_path = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.tmp')
+    try:
+        yield tmp_path
+        if fsync:
+            _fsync_file(tmp_path)
+        os.replace(tmp_path, path)
+        if fsync:
+            _fsync_directory(path.parent)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+
+@contextmanager
+def atomic_write(path:str | Path, mode:str='w', fsync:bool=False, **open_kwargs:Any) -> Iterator[IO]:
+    """
+    Open a temporary file next to `path` for writing, and move it into place with `os.replace` when the block exits without errors. See `atomic_path`.
+
+    Example:
+        with atomic_write('dtypes.json') as file:
+            json.dump(dtypes, file)
+
+    Args:
+        path (str | Path): Final path of the file.
+        mode (str, optional): Mode to open the file in, 'w' or 'wb'. Defaults to 'w'.
+        fsync (bool, optional): Flush the file and its directory entry to disk before returning. Defaults to False.
+        **open_kwargs: Passed on to `open`, e.g. `encoding` or `newline`.
+    """
+    with atomic_path(path, fsync=fsync) as tmp_path:
+        with open(tmp_path, mode, **open_kwargs) as file:
+            yield file
+
+
+
+class ConcurrentWriter:
+    """
+    Thread pool that writes many files concurrently, e.g. with `store_dtypes_as_json` or `extract_sheets_from_Excel`.
+
+    Writing is mostly waiting for the disk or network, so threads let many writes overlap. Leaving the `with` block waits for all writes,
+    and raises the first error, if any. Results are available in submission order from `results`.
+
+    Example:
+        with ConcurrentWriter(max_workers=8) as writer:
+            for name, df in frames.items():
+                writer.submit(store_dtypes_as_json, df, directory_path='schemas', file_name=name)
+        written_paths = writer.results
+
+    Args:
+        max_workers (Optional[int], optional): Number of threads. Defaults to None, which uses the default of `ThreadPoolExecutor`.
+        max_pending (Optional[int], optional): Maximum number of submitted writes that have not finished. `submit` blocks until a write finishes
+            when the limit is reached, which bounds the memory held by pending writes. Defaults to None, which does not limit them.
+    """
+
+    def __init__(self, max_workers:Optional[int]=None, max_pending:Optional[int]=None) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vegetable_patch_writer')
+        self._pending = None if max_pending is None else threading.BoundedSemaphore(max_pending)
+        self._futures: list[Future] = []
+        self.results: list[Any] = []
+
+    def __enter__(self) -> ConcurrentWriter:
+        return self
+
+    def __exit__(self, exc_type:Any, exc_value:Any, traceback:Any) -> None:
+        if exc_type is not None:
+            # Do not start writes that are still queued, but let running ones finish:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            return
+        self.wait()
+
+    def submit(self, function:Callable[..., Any], /, *args:Any, **kwargs:Any) -> Future:
+        """
+        Call `function(*args, **kwargs)` in the thread pool.
+        """
+        if self._pending is not None:
+            self._pending.acquire()
+        try:
+            future = self._executor.submit(function, *args, **kwargs)
+        except BaseException:
+            if self._pending is not None:
+                self._pending.release()
+            raise
+        if self._pending is not None:
+            future.add_done_callback(lambda _: self._pending.release())
+        self._futures.append(future)
+        return future
+
+    def wait(self) -> list[Any]:
+        """
+        Wait for all writes, shut the thread pool down, and return the results in submission order.
+
+        Raises:
+            Exception: The first error raised by a write.
+        """
+        self._executor.shutdown(wait=True)
+        self.results = [future.result() for future in self._futures]
+        return self.results
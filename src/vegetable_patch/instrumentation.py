@@ -0,0 +1,284 @@
+"""
+Opt-in instrumentation of the public functions of string_utils, path_utils and dataframe_utils.
+
+When enabled, every call records its wall time and the size of its main input (characters, rows, columns, items or bytes),
+which can be read as a snapshot, stored as JSON, or forwarded to a callback, e.g. to send them to a metrics system.
+When disabled (the default), an instrumented function only adds a flag check and a forwarded call, i.e. a fraction of a microsecond.
+
+Enable it with the environment variable VEGETABLE_PATCH_INSTRUMENTATION=1 (read on import), or with `enable()`.
+
+Example:
+    from vegetable_patch import instrumentation
+    instrumentation.enable()
+    ...
+    stats = instrumentation.snapshot()
+    stats['dataframe_utils.extract_sheets_from_Excel']['total_seconds']
+
+Times are inclusive: when an instrumented function calls another one (e.g. `store_dtypes_from_file` calls `infer_dtypes`), the time of
+the inner call is also part of the outer call's time, so the 'total_seconds' of different functions overlap and should not be added up.
+The 'total_self_seconds' exclude the time of nested instrumented calls in the same thread, and do add up to the time spent in the package.
+
+Calls made in worker processes (e.g. with `max_workers`) are not recorded, but the call that started them is.
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional
+
+
+ENVIRONMENT_VARIABLE = 'VEGETABLE_PATCH_INSTRUMENTATION'
+
+# Percentiles are computed over the latencies of this many most recent calls of each function:
+MAX_SAMPLES = 10_000
+
+SIZE_UNITS = ('characters', 'rows', 'columns', 'items', 'bytes')
+
+_enabled = os.environ.get(ENVIRONMENT_VARIABLE, '').lower() in ('1', 'true', 'yes', 'on')
+_callback: Optional[Callable[['CallRecord'], Any]] = None
+_lock = threading.Lock()
+_stats: dict[str, '_FunctionStats'] = {}
+# Per thread, the time spent in nested instrumented calls of each running instrumented call:
+_local = threading.local()
+
+
+
+class CallRecord(NamedTuple):
+    """
+    A single call to an instrumented function, as passed to the callback of `enable`.
+
+    Attributes:
+        function (str): Name of the function, e.g. 'string_utils.format_string'.
+        seconds (float): Wall time of the call, including nested instrumented calls.
+        input_size (Optional[int]): Size of the main input in `unit`, or None if unknown.
+        unit (Optional[str]): Unit of `input_size`, one of ('characters', 'rows', 'columns', 'items', 'bytes'), or None.
+        error (Optional[str]): Name of the exception type if the call raised, otherwise None.
+        self_seconds (float): Wall time of the call, excluding nested instrumented calls made in the same thread.
+    """
+    function: str
+    seconds: float
+    input_size: Optional[int]
+    unit: Optional[str]
+    error: Optional[str]
+    self_seconds: float
+
+
+
+class _FunctionStats:
+    """
+    Accumulated statistics of one instrumented function.
+    """
+    __slots__ = ('unit', 'calls', 'errors', 'total_seconds', 'total_self_seconds', 'max_seconds', 'samples', 'total_input_size', 'max_input_size')
+
+    def __init__(self, unit:Optional[str]) -> None:
+        self.unit = unit
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.total_self_seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples: deque[float] = deque(maxlen=MAX_SAMPLES)
+        self.total_input_size = 0
+        self.max_input_size: Optional[int] = None
+
+    def add(self, record:CallRecord) -> None:
+        self.calls += 1
+        self.errors += record.error is not None
+        self.total_seconds += record.seconds
+        self.total_self_seconds += record.self_seconds
+        self.max_seconds = max(self.max_seconds, record.seconds)
+        self.samples.append(record.seconds)
+        if record.input_size is not None:
+            self.total_input_size += record.input_size
+            self.max_input_size = record.input_size if self.max_input_size is None else max(self.max_input_size, record.input_size)
+
+    def to_dict(self) -> dict[str, Any]:
+        samples = sorted(self.samples)
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_seconds': self.total_seconds,
+            'total_self_seconds': self.total_self_seconds,
+            'mean_seconds': self.total_seconds / self.calls if self.calls else None,
+            'max_seconds': self.max_seconds,
+            'p50_seconds': _percentile(samples, 50),
+            'p90_seconds': _percentile(samples, 90),
+            'p99_seconds': _percentile(samples, 99),
+            'input_unit': self.unit,
+            'total_input_size': self.total_input_size if self.unit else None,
+            'max_input_size': self.max_input_size,
+        }
+
+
+
+def _percentile(sorted_samples:list[float], percentile:float) -> Optional[float]:
+    """
+    Nearest-rank percentile of sorted samples, or None if there are none.
+    """
+    if not sorted_samples:
+        return None
+    rank = max(0, -(-len(sorted_samples) * percentile // 100) - 1)  # ceil(n * p / 100) - 1
+    return sorted_samples[int(rank)]
+
+
+
+def _input_size(value:Any, unit:str) -> Optional[int]:
+    """
+    Size of an input in `unit`. Never consumes iterators, and returns None if the size cannot be determined.
+    """
+    try:
+        if unit == 'bytes':
+            if isinstance(value, (str, os.PathLike)):
+                return os.path.getsize(value)
+            if isinstance(value, (list, tuple)):
+                return sum(os.path.getsize(path) for path in value)
+            return None
+        if unit == 'columns':
+            return len(value.columns)
+        return len(value)
+    except (OSError, TypeError, AttributeError):
+        return None
+
+
+
+def _record(record:CallRecord) -> None:
+    """
+    Add a call to the statistics, and pass it to the callback.
+    """
+    with _lock:
+        stats = _stats.get(record.function)
+        if stats is None:
+            stats = _stats[record.function] = _FunctionStats(record.unit)
+        stats.add(record)
+    callback = _callback
+    if callback is not None:
+        callback(record)
+
+
+
+def instrumented(unit:Optional[str]=None) -> Callable[[Callable], Callable]:
+    """
+    Decorator that records calls to a public function while instrumentation is enabled.
+
+    Args:
+        unit (Optional[str], optional): How to measure the size of the function's first argument: 'characters' (of a string), 'rows' (of a frame,
+            Series or list), 'columns' (of a frame), 'items' (of a list) or 'bytes' (of the file at a path, or the files at a list of paths).
+            Defaults to None, which does not record input sizes.
+
+    Raises:
+        ValueError: `unit` is not one of the supported units.
+    """
+    if unit is not None and unit not in SIZE_UNITS:
+        raise ValueError(f'Unit must be one of {SIZE_UNITS}, currently {unit=}.')
+
+    def decorator(function:Callable) -> Callable:
+        # 'vegetable_patch.string_utils.utils' -> 'string_utils.format_string':
+        module_parts = function.__module__.split('.')
+        name = f'{module_parts[1] if len(module_parts) > 2 else module_parts[-1]}.{function.__qualname__}'
+        code = function.__code__
+        first_argument = code.co_varnames[0] if code.co_argcount else None
+
+        @functools.wraps(function)
+        def wrapper(*args:Any, **kwargs:Any) -> Any:
+            if not _enabled:
+                return function(*args, **kwargs)
+
+            input_size = None
+            if unit is not None:
+                if args:
+                    input_size = _input_size(args[0], unit)
+                elif first_argument in kwargs:
+                    input_size = _input_size(kwargs[first_argument], unit)
+
+            nested_seconds = getattr(_local, 'nested_seconds', None)
+            if nested_seconds is None:
+                nested_seconds = _local.nested_seconds = []
+            nested_seconds.append(0.0)
+
+            error = None
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except BaseException as e:
+                error = type(e).__name__
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                self_seconds = seconds - nested_seconds.pop()
+                if nested_seconds:
+                    nested_seconds[-1] += seconds
+                _record(CallRecord(name, seconds, input_size, unit, error, self_seconds))
+
+        return wrapper
+
+    return decorator
+
+
+
+def enable(callback:Optional[Callable[[CallRecord], Any]]=None) -> None:
+    """
+    Start recording calls to the public functions of the subpackages.
+
+    Args:
+        callback (Optional[Callable[[CallRecord], Any]], optional): Called with a `CallRecord` after every call, in the thread that made the call.
+            Defaults to None, which only accumulates the statistics returned by `snapshot`.
+    """
+    global _enabled, _callback
+    _callback = callback
+    _enabled = True
+
+
+
+def disable() -> None:
+    """
+    Stop recording calls. Statistics recorded so far are kept until `reset`.
+    """
+    global _enabled, _callback
+    _enabled = False
+    _callback = None
+
+
+
+def is_enabled() -> bool:
+    """
+    Return whether calls are being recorded.
+    """
+    return _enabled
+
+
+
+def reset() -> None:
+    """
+    Discard all recorded statistics.
+    """
+    with _lock:
+        _stats.clear()
+
+
+
+def snapshot() -> dict[str, dict[str, Any]]:
+    """
+    Return the statistics recorded so far, by function name, e.g. 'dataframe_utils.extract_sheets_from_Excel'.
+
+    Each function has 'calls', 'errors', 'total_seconds', 'total_self_seconds', 'mean_seconds', 'max_seconds', the 'p50_seconds', 'p90_seconds'
+    and 'p99_seconds' percentiles (over the last 10,000 calls), and the 'input_unit', 'total_input_size' and 'max_input_size' of the inputs.
+    All times except 'total_self_seconds' include nested instrumented calls, see the module docstring.
+    """
+    with _lock:
+        return {name: stats.to_dict() for name, stats in sorted(_stats.items())}
+
+
+
+def to_json(path:Optional[str | Path]=None) -> str:
+    """
+    Return the statistics of `snapshot` as a JSON string, and store it to `path` if provided.
+    """
+    import json
+
+    text = json.dumps(snapshot(), indent=4)
+    if path is not None:
+        Path(path).write_text(text)
+    return text
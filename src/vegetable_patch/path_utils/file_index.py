@@ -0,0 +1,239 @@
+"""
+In-memory (optionally on-disk) index of the files under a directory, for fast repeated globbing.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+class FileEntry(NamedTuple):
+    """
+    A file in a `FileIndex`.
+
+    Attributes:
+        path (Path): Path to the file.
+        size (int): Size in bytes.
+        mtime (float): Modification time in seconds since the epoch.
+    """
+    path: Path
+    size: int
+    mtime: float
+
+
+
+def _glob_to_regex(pattern:str) -> re.Pattern:
+    """
+    Convert a glob pattern relative to the index root (e.g. '**/*.csv') to a regex matching '/'-separated relative paths.
+    '**' matches any number of directories, '*' and '?' do not match '/', and '[...]' is a character class.
+    """
+    segments = pattern.split('/')
+    regex = ''
+    for i, segment in enumerate(segments):
+        is_last = i == len(segments) - 1
+        if segment == '**':
+            regex += '.*' if is_last else '(?:.*/)?'
+            continue
+
+        j = 0
+        while j < len(segment):
+            char = segment[j]
+            if char == '*':
+                regex += '[^/]*'
+            elif char == '?':
+                regex += '[^/]'
+            elif char == '[' and segment.find(']', j + 2) != -1:
+                end = segment.find(']', j + 2)
+                char_class = segment[j + 1:end]
+                if char_class.startswith('!'):
+                    char_class = '^' + char_class[1:]
+                regex += f'[{char_class}]'
+                j = end
+            else:
+                regex += re.escape(char)
+            j += 1
+
+        if not is_last:
+            regex += '/'
+
+    return re.compile(regex, re.DOTALL)
+
+
+
+class FileIndex:
+    """
+    Index of all files under a root directory, with their sizes and modification times, that answers glob and suffix queries
+    without walking the file system.
+
+    The index is built with `os.scandir`. `refresh` updates it incrementally, by only re-scanning directories whose modification time
+    has changed, i.e. directories where files or subdirectories were added, removed or renamed. Changes to the size or modification time
+    of existing files in otherwise unchanged directories are only picked up with `refresh(full=True)`.
+
+    Example:
+        index = FileIndex(find_project_root() / 'data', index_path='.file_index.json')
+        csv_paths = index.rglob('*.csv')
+        index.refresh()
+
+    Args:
+        root (str | Path): Directory to index.
+        index_path (Optional[str | Path], optional): File to store the index in. If it exists, the index is loaded from it and refreshed,
+            and the index is saved to it after every refresh. Defaults to None, which keeps the index in memory only.
+
+    Raises:
+        NotADirectoryError: `root` is not a directory.
+    """
+
+    def __init__(self, root:str | Path, index_path:Optional[str | Path]=None) -> None:
+        self.root = Path(root).resolve()
+        if not self.root.is_dir():
+            raise NotADirectoryError(f"'{self.root}' is not a directory.")
+        self.index_path = None if index_path is None else Path(index_path)
+
+        # Relative directory path ('' for the root) -> (directory mtime in ns, {file name: (size, mtime in ns)}, [subdirectory names]):
+        self._directories: dict[str, tuple[int, dict[str, tuple[int, int]], list[str]]] = {}
+        self._files: Optional[list[tuple[str, Path, int, int]]] = None
+
+        if self.index_path is not None and self.index_path.exists():
+            self._load(self.index_path)
+        self.refresh()
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({str(self.root)!r}, index_path={None if self.index_path is None else str(self.index_path)!r})'
+
+    def __len__(self) -> int:
+        return len(self._all_files())
+
+    @staticmethod
+    def _scan(directory:str) -> tuple[dict[str, tuple[int, int]], list[str]]:
+        """
+        List the files (with size and mtime) and subdirectories of a single directory.
+        """
+        files = {}
+        subdirectories = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.name)
+                        elif entry.is_file():
+                            stat_result = entry.stat()
+                            files[entry.name] = (stat_result.st_size, stat_result.st_mtime_ns)
+                    except OSError:  # E.g. a broken link, or a file removed while scanning
+                        continue
+        except OSError:  # E.g. no permission to list the directory
+            pass
+        return files, subdirectories
+
+    def refresh(self, full:bool=False) -> int:
+        """
+        Update the index, re-scanning only directories whose modification time has changed.
+
+        Args:
+            full (bool, optional): Re-scan all directories. Defaults to False.
+
+        Returns:
+            int: Number of directories that were scanned.
+        """
+        root = str(self.root)
+        directories = {}
+        n_scanned = 0
+        stack = ['']
+        while stack:
+            relative_path = stack.pop()
+            directory = os.path.join(root, relative_path) if relative_path else root
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:  # Removed since it was listed
+                continue
+
+            known = None if full else self._directories.get(relative_path)
+            if known is not None and known[0] == mtime:
+                files, subdirectories = known[1], known[2]
+            else:
+                files, subdirectories = self._scan(directory)
+                n_scanned += 1
+
+            directories[relative_path] = (mtime, files, subdirectories)
+            stack.extend(f'{relative_path}/{name}' if relative_path else name for name in subdirectories)
+
+        self._directories = directories
+        self._files = None
+        if self.index_path is not None:
+            self.save(self.index_path)
+
+        return n_scanned
+
+    def _all_files(self) -> list[tuple[str, Path, int, int]]:
+        """
+        All files as ('/'-separated path relative to the root, path, size, mtime in ns), built once per refresh.
+        """
+        if self._files is None:
+            root = self.root
+            self._files = [
+                (relative_file_path, root / relative_file_path, size, mtime)
+                for relative_path, (_, files, _) in self._directories.items()
+                for name, (size, mtime) in files.items()
+                for relative_file_path in (f'{relative_path}/{name}' if relative_path else name,)
+            ]
+        return self._files
+
+    def entries(self, pattern:str='**') -> list[FileEntry]:
+        """
+        Return the indexed files matching a glob pattern relative to the root, with their sizes and modification times.
+        """
+        regex = _glob_to_regex(pattern)
+        return [
+            FileEntry(path, size, mtime / 1e9)
+            for relative_path, path, size, mtime in self._all_files()
+            if regex.fullmatch(relative_path)
+        ]
+
+    def glob(self, pattern:str) -> list[Path]:
+        """
+        Return the paths of the indexed files matching a glob pattern relative to the root, like `Path(root).glob(pattern)` for files.
+        """
+        regex = _glob_to_regex(pattern)
+        return [path for relative_path, path, _, _ in self._all_files() if regex.fullmatch(relative_path)]
+
+    def rglob(self, pattern:str) -> list[Path]:
+        """
+        Return the paths of the indexed files matching a glob pattern in any directory, like `Path(root).rglob(pattern)` for files.
+        """
+        return self.glob(f'**/{pattern}')
+
+    def with_suffix(self, *suffixes:str) -> list[Path]:
+        """
+        Return the paths of the indexed files with any of the given suffixes, e.g. `index.with_suffix('.csv', '.xlsx')`.
+        """
+        return [path for relative_path, path, _, _ in self._all_files() if relative_path.endswith(suffixes)]
+
+    def save(self, path:str | Path) -> None:
+        """
+        Store the index as JSON, so it can be loaded with `FileIndex(root, index_path=path)`.
+        """
+        path = Path(path)
+        data = {'root': str(self.root), 'directories': self._directories}
+        # Write to a temporary file first, so a crash never leaves a partial index behind:
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+
+    def _load(self, path:Path) -> None:
+        """
+        Load an index stored with `save`. An index of another root, or an unreadable index, is ignored.
+        """
+        try:
+            with open(path) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get('root') != str(self.root):
+            return
+        self._directories = {
+            relative_path: (mtime, {name: tuple(stats) for name, stats in files.items()}, subdirectories)
+            for relative_path, (mtime, files, subdirectories) in data['directories'].items()
+        }
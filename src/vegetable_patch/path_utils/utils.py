@@ -1,56 +1,207 @@
+import os
+import stat
 from pathlib import Path
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
 
+from ..instrumentation import instrumented
 
-def get_stem_path(stem_dir_name: str) -> str:
+
+DEFAULT_ROOT_MARKERS = ('pyproject.toml', '.git')
+
+
+
+@lru_cache(maxsize=128)
+def _find_project_root(cwd:str, stem_dir_name:Optional[str], markers:tuple[str, ...], ceiling:Optional[str]) -> Path:
     """
-    Meant to facilitate sys.path.append() in scripts that are run from within a project
+    Cached implementation of `find_project_root`, for a given working directory.
     """
-    cwd = Path()
-    if stem_dir_name not in cwd.resolve().parts:
+    cwd_path = Path(cwd).resolve()
+    candidates = [cwd_path, *cwd_path.parents]
+
+    # Do not look above the ceiling (if it is a parent of the working directory):
+    if ceiling is not None:
+        ceiling_path = Path(ceiling).resolve()
+        if ceiling_path in candidates:
+            candidates = candidates[:candidates.index(ceiling_path) + 1]
+
+    if stem_dir_name is not None:
+        # Use the outermost directory with the name, like `get_stem_path` always has:
+        for candidate in reversed(candidates):
+            if candidate.name == stem_dir_name:
+                return candidate
         raise ModuleNotFoundError(f"""\
 Program is executed from path that do not include the specified stem directory 
 (i.e. '{stem_dir_name}' is not included in the working directory path). Run the
 program from within a sub-directory of the stem directory.
 """)
-    path_parts = cwd.resolve().parts
-    stem_path = Path(*path_parts[: path_parts.index(stem_dir_name) + 1])
 
-    return str(stem_path)
+    for candidate in candidates:
+        if any((candidate / marker).exists() for marker in markers):
+            return candidate
+    raise ModuleNotFoundError(f"""\
+Program is executed from path without a project root (i.e. no directory from the 
+working directory '{cwd_path}' and up contains any of {markers}).
+""")
 
 
 
-def check_read_file(file_path) -> None:
+@instrumented()
+def find_project_root(stem_dir_name:Optional[str]=None, markers:Iterable[str]=DEFAULT_ROOT_MARKERS, ceiling:Optional[str | Path]=None) -> Path:
+    """
+    Find the root directory of the project the program is run from, either by directory name or by marker files.
+
+    The result is cached per working directory (and arguments), so repeated calls, e.g. from many modules at import time, are nearly free.
+    Use `clear_project_root_cache` if the file system changes in a way that should change the result.
+
+    Args:
+        stem_dir_name (Optional[str], optional): Name of the root directory. The outermost directory with this name in the working directory path is used. 
+            Defaults to None, which uses `markers` instead.
+        markers (Iterable[str], optional): File or directory names that mark the root, e.g. a sentinel file such as '.project-root'. 
+            The closest directory from the working directory and up that contains any of them is used. Defaults to ('pyproject.toml', '.git').
+        ceiling (Optional[str | Path], optional): Do not look above this directory. Defaults to None, which looks all the way to the file system root.
+
+    Raises:
+        ModuleNotFoundError: No root directory is found.
+
+    Returns:
+        Path: Resolved path to the root directory.
+    """
+    return _find_project_root(os.getcwd(), stem_dir_name, tuple(markers), None if ceiling is None else str(ceiling))
+
+
+
+@instrumented()
+def clear_project_root_cache() -> None:
+    """
+    Clear the cache of `find_project_root` and `get_stem_path`.
+    """
+    _find_project_root.cache_clear()
+
+
+
+@instrumented()
+def get_stem_path(stem_dir_name: str) -> str:
+    """
+    Meant to facilitate sys.path.append() in scripts that are run from within a project
+    """
+    return str(find_project_root(stem_dir_name=stem_dir_name))
+
+
+
+class PathCheck(NamedTuple):
+    """
+    Result of checking access to a single path with `check_paths`.
+
+    Attributes:
+        path (str): The checked path.
+        mode (str): 'r' for read access or 'w' for write access.
+        error (Optional[OSError]): Why the path cannot be accessed, or None if it can.
+    """
+    path: str
+    mode: str
+    error: Optional[OSError]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+
+def _check_path(path:str | os.PathLike, mode:str) -> PathCheck:
     """
-    Check if the file exists and can be read.
+    Check access to a single path without opening or creating it.
     """
+    path = os.fspath(path)
+
     try:
-        # Try opening the file in append mode (non-destructive test)
-        with open(file_path, "a"):
-            pass  # Just open and immediately close to check access
-    except PermissionError:
-        raise PermissionError(
-            f"Permission denied: The file '{file_path}' is open in another program."
-        )
+        stat_result: Optional[os.stat_result] = os.stat(path)
     except FileNotFoundError:
-        raise FileNotFoundError(f"No file with path '{file_path}'.")
-    except Exception as e:
-        raise Exception(f"An unexpected error occurred while checking file access: {e}")
+        stat_result = None
+    except OSError as e:
+        return PathCheck(path, mode, e)
+
+    if stat_result is not None and stat.S_ISDIR(stat_result.st_mode):
+        return PathCheck(path, mode, IsADirectoryError(f"The path '{path}' is a directory."))
+
+    if mode == 'r':
+        if stat_result is None:
+            return PathCheck(path, mode, FileNotFoundError(f"No file with path '{path}'."))
+        if not os.access(path, os.R_OK):
+            return PathCheck(path, mode, PermissionError(f"Permission denied: The file '{path}' cannot be read."))
+        return PathCheck(path, mode, None)
+
+    if stat_result is not None:
+        if not os.access(path, os.W_OK):
+            return PathCheck(path, mode, PermissionError(f"Permission denied: The file '{path}' cannot be written to."))
+        return PathCheck(path, mode, None)
+
+    # The file does not exist, so check that it can be made in the parent directory:
+    parent = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(parent):
+        return PathCheck(path, mode, FileNotFoundError(f"Directory '{parent}' does not exist."))
+    if not os.access(parent, os.W_OK | os.X_OK):
+        return PathCheck(path, mode, PermissionError(f"Permission denied: Cannot make files in directory '{parent}'."))
+    return PathCheck(path, mode, None)
+
+
+
+@instrumented('items')
+def check_paths(paths:Iterable[str | os.PathLike], mode:str='r', max_workers:Optional[int]=None) -> list[PathCheck]:
+    """
+    Check read or write access to many paths concurrently, without opening, modifying or creating any files.
+
+    Uses `os.stat` and `os.access`, and for files that do not exist yet, whether the parent directory is writable.
+    All paths are checked, and a result is returned per path rather than raising on the first failure. 
+    Note that `os.access` does not detect files that are locked by another program (e.g. on Windows).
 
+    Example:
+        failed = [check for check in check_paths(input_paths, mode='r') if not check.ok]
 
+    Args:
+        paths (Iterable[str | os.PathLike]): Paths to check.
+        mode (str, optional): Choose; 'r' to check that the files exist and can be read, or 'w' to check that they can be written to or made. Defaults to 'r'.
+        max_workers (Optional[int], optional): Number of threads to check paths with, which speeds up checks on network mounts. 
+            Defaults to None, which uses the default of `ThreadPoolExecutor`.
 
+    Raises:
+        ValueError: `mode` is not 'r' or 'w'.
+
+    Returns:
+        list[PathCheck]: One result per path, in the same order as `paths`.
+    """
+    VALID_MODES = ('r', 'w')
+    if mode not in VALID_MODES:
+        raise ValueError(f'Mode must be one of {VALID_MODES}, currently {mode=}.')
+
+    paths = list(paths)
+    if len(paths) <= 1 or max_workers == 1:
+        return [_check_path(path, mode) for path in paths]
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_check_path, paths, [mode] * len(paths)))
+
+
+
+@instrumented()
+def check_read_file(file_path) -> None:
+    """
+    Check if the file exists and can be read. Use `check_paths` to check many files at once.
+    """
+    error = _check_path(file_path, 'r').error
+    if error is not None:
+        raise error
+
+
+
+@instrumented()
 def check_write_file(file_path) -> None:
     """
-    Check if the file can be made or be written to if already present.
+    Check if the file can be made or be written to if already present. Use `check_paths` to check many files at once.
     """
-    try:
-        # Try opening the file in append mode (non-destructive test)
-        with open(file_path, "a"):
-            pass  # Just open and immediately close to check access
-    except PermissionError:
-        raise PermissionError(
-            f"Permission denied: The file '{file_path}' is open in another program."
-        )
-    except FileNotFoundError:
-        pass  # Do nothing if the file is not currently made.
-    except Exception as e:
-        raise Exception(f"An unexpected error occurred while checking file access: {e}")
\ No newline at end of file
+    error = _check_path(file_path, 'w').error
+    # Like before, only raise if the file (or directory) is present but cannot be written to:
+    if isinstance(error, (PermissionError, IsADirectoryError)):
+        raise error
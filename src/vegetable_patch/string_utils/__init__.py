@@ -1 +1,3 @@
-from .utils import *
\ No newline at end of file
+from .utils import *
+from .streaming import *
+from .vocabulary import *
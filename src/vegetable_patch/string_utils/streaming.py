@@ -0,0 +1,130 @@
+"""
+Streaming rewriters that apply the string utils to files that are too large to read into memory.
+"""
+
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..instrumentation import instrumented
+
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MiB
+
+
+
+def _line_aligned_ranges(read_path:str | Path, n_ranges:int) -> list[tuple[int, int]]:
+    """
+    Split a file into (up to) `n_ranges` byte ranges of roughly equal size that start and end on line boundaries.
+    """
+    size = os.path.getsize(read_path)
+    boundaries = [0]
+    with open(read_path, 'rb') as read_file:
+        for i in range(1, n_ranges):
+            target = size * i // n_ranges
+            if target <= boundaries[-1]:
+                continue
+            # Move to the start of the first line that begins at or after the target:
+            read_file.seek(target - 1)
+            read_file.readline()
+            boundary = read_file.tell()
+            if boundary >= size:
+                break
+            boundaries.append(boundary)
+    boundaries.append(size)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+
+def _rewrite_byte_range(read_path:str | Path, write_path:str | Path, start:int, end:int, transform:Callable[[str], str], chunk_size:int, encoding:str) -> None:
+    """
+    Apply `transform` to the bytes in [start, end) of `read_path` and write the result to `write_path`.
+    The range is read in chunks that are cut at the last line break, so that a line is never split between two calls to `transform`.
+    """
+    with open(read_path, 'rb') as read_file, open(write_path, 'wb') as write_file:
+        read_file.seek(start)
+        remaining = end - start
+        carry = b''
+        while remaining > 0:
+            chunk = read_file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            chunk = carry + chunk
+
+            # Keep the incomplete last line for the next chunk:
+            cut = chunk.rfind(b'\n') + 1
+            chunk, carry = chunk[:cut], chunk[cut:]
+            if chunk:
+                write_file.write(transform(chunk.decode(encoding)).encode(encoding))
+
+        if carry:
+            write_file.write(transform(carry.decode(encoding)).encode(encoding))
+
+
+
+@instrumented('bytes')
+def rewrite_file(read_path:str | Path, write_path:str | Path, transform:Callable[[str], str], chunk_size:int=DEFAULT_CHUNK_SIZE, max_workers:Optional[int]=None, encoding:str='utf-8') -> None:
+    """
+    Stream a text file through a string transform and write the result to another file, without reading the whole file into memory.
+
+    The file is processed in chunks of whole lines, so any match that does not span a line break is handled correctly,
+    also when it straddles a chunk boundary. Peak memory is roughly `chunk_size` (plus the longest line) per process.
+
+    Example:
+        rewrite_file('export.csv', 'export_iso_dates.csv', dayfirst_to_international_format_date, max_workers=8)
+        rewrite_file('log.txt', 'log_normalized.txt', CaseInsensitiveReplacer({'ecoli': 'E. coli'}))
+
+    Args:
+        read_path (str | Path): Path to the file to read.
+        write_path (str | Path): Path to write the rewritten file to. Cannot be the same file as `read_path`.
+        transform (Callable[[str], str]): Function applied to each chunk of lines, e.g. `dayfirst_to_international_format_date`,
+            a `CaseInsensitiveReplacer`, or `functools.partial(replace_case_insensitive, search_pattern=..., replacement=...)`.
+            Must be picklable if `max_workers` is used, and must not match across line breaks.
+        chunk_size (int, optional): Number of bytes to read at a time. Defaults to 8 MiB.
+        max_workers (Optional[int], optional): Split the file in line-aligned byte ranges and rewrite them in a process pool
+            of this size. Defaults to None, which rewrites the file in the current process.
+        encoding (str, optional): Encoding of the file. Must be ASCII compatible (e.g. UTF-8 or Latin-1). Defaults to 'utf-8'.
+
+    Raises:
+        ValueError: `chunk_size` is not positive.
+        ValueError: `read_path` and `write_path` are the same file.
+        FileNotFoundError: `read_path` does not exist.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"`chunk_size` must be positive, currently {chunk_size=}.")
+
+    read_path, write_path = Path(read_path), Path(write_path)
+    if not read_path.exists():
+        raise FileNotFoundError(f"No file with path '{read_path}'.")
+    if write_path.exists() and read_path.samefile(write_path):
+        raise ValueError("`read_path` and `write_path` cannot be the same file.")
+
+    if not max_workers or max_workers == 1:
+        _rewrite_byte_range(read_path, write_path, 0, os.path.getsize(read_path), transform, chunk_size, encoding)
+        return
+
+    # Imported here, as the process pool machinery is slow to import and only needed with max_workers:
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Rewrite each byte range to its own part file, then concatenate the parts in order:
+    ranges = _line_aligned_ranges(read_path, max_workers)
+    part_paths = [write_path.with_name(f'.{write_path.name}.part{i}') for i in range(len(ranges))]
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_rewrite_byte_range, read_path, part_path, start, end, transform, chunk_size, encoding)
+                for part_path, (start, end) in zip(part_paths, ranges)
+            ]
+            for future in futures:
+                future.result()
+
+        with open(write_path, 'wb') as write_file:
+            for part_path in part_paths:
+                with open(part_path, 'rb') as part_file:
+                    shutil.copyfileobj(part_file, write_file, chunk_size)
+    finally:
+        for part_path in part_paths:
+            part_path.unlink(missing_ok=True)
@@ -0,0 +1,93 @@
+"""
+Vocabularies of tokens whose casing is kept when formatting strings, e.g. gene names, units and acronyms.
+"""
+
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+
+class ProtectedVocabulary:
+    """
+    Case-insensitive vocabulary of tokens with a canonical casing, e.g. 'pH', '3D', 'BRCA1' or 'mRNA'.
+
+    Tokens are stored in a hash map from their case-folded form to their canonical form, so looking up a token costs the same
+    for a vocabulary of ten or a million tokens. Build it once (e.g. with `from_file`) and pass it to `StringFormatter`,
+    `format_string` or `format_strings` with `protected=vocabulary`; it is shared, not copied, between formatters.
+
+    Example:
+        vocabulary = ProtectedVocabulary.from_file('gene_names.txt')
+        vocabulary.update(['pH', '3D'])
+        format_strings(df['sample'], case_to='lower', protected=vocabulary)  # 'PH_BRCA1' -> 'pH_BRCA1'
+
+    Args:
+        tokens (Iterable[str], optional): Tokens in their canonical casing. Defaults to (), an empty vocabulary.
+
+    Raises:
+        ValueError: A token is empty, or two tokens only differ in casing (e.g. 'Co' and 'CO'), which would make the canonical casing ambiguous.
+    """
+    __slots__ = ('_canonical',)
+
+    def __init__(self, tokens:Iterable[str]=()) -> None:
+        self._canonical: dict[str, str] = {}
+        self.update(tokens)
+
+    @classmethod
+    def from_file(cls, path:str | Path, comment:Optional[str]='#', encoding:str='utf-8') -> 'ProtectedVocabulary':
+        """
+        Load a vocabulary from a text file with one token per line. Leading and trailing whitespace, empty lines,
+        and lines starting with `comment` are ignored. The file is read line by line.
+
+        Raises:
+            ValueError: Same as `ProtectedVocabulary`.
+        """
+        vocabulary = cls()
+        with open(path, encoding=encoding) as file:
+            vocabulary.update(
+                token for token in (line.strip() for line in file)
+                if token and not (comment and token.startswith(comment))
+            )
+        return vocabulary
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(<{len(self)} tokens>)'
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._canonical.values())
+
+    def __contains__(self, token:object) -> bool:
+        return isinstance(token, str) and token.casefold() in self._canonical
+
+    def __eq__(self, other:object) -> bool:
+        if not isinstance(other, ProtectedVocabulary):
+            return NotImplemented
+        return self._canonical == other._canonical
+
+    def add(self, token:str) -> None:
+        """
+        Add a token in its canonical casing. Adding a token that is already in the vocabulary with the same casing does nothing.
+
+        Raises:
+            ValueError: Same as `ProtectedVocabulary`.
+        """
+        if not token:
+            raise ValueError('Protected tokens cannot be empty.')
+        folded = token.casefold()
+        canonical = self._canonical.setdefault(folded, token)
+        if canonical != token:
+            raise ValueError(f"Protected tokens {canonical!r} and {token!r} only differ in casing.")
+
+    def update(self, tokens:Iterable[str]) -> None:
+        """
+        Add several tokens in their canonical casing, see `add`.
+        """
+        for token in tokens:
+            self.add(token)
+
+    def get(self, token:str, default:Optional[str]=None) -> Optional[str]:
+        """
+        Return the canonical casing of a token in any casing, or `default` if it is not in the vocabulary.
+        """
+        return self._canonical.get(token.casefold(), default)
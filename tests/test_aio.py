@@ -0,0 +1,88 @@
+import asyncio
+import json
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from vegetable_patch import aio
+from vegetable_patch.aio import AsyncRunner
+
+
+class TestAio(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.df = pd.DataFrame({'id': [1, 2], 'name': ['a', 'b']})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_check_paths(self):
+        existing = self.dir / 'data.csv'
+        self.df.to_csv(existing, index=False)
+
+        async def main():
+            checks = await aio.check_paths([existing, self.dir / 'missing.csv'])
+            with self.assertRaises(FileNotFoundError):
+                await aio.check_read_file(self.dir / 'missing.csv')
+            with self.assertRaises(ValueError):
+                await aio.check_paths([existing], mode='x')
+            return checks
+
+        checks = asyncio.run(main())
+        self.assertIsNone(checks[0].error)
+        self.assertIsInstance(checks[1].error, FileNotFoundError)
+
+    def test_store_dtypes(self):
+        async def main():
+            async with AsyncRunner(max_workers=4, max_concurrency=2) as runner:
+                return await asyncio.gather(*(
+                    runner.store_dtypes_as_json(self.df, full_path=self.dir / f'dtypes_{i}.json') for i in range(10)
+                ))
+
+        paths = asyncio.run(main())
+        self.assertEqual(len(paths), 10)
+        self.assertEqual(json.loads(paths[-1].read_text()), {'id': 'int64', 'name': 'str'})
+
+    def test_configure_keeps_queued_calls(self):
+        async def main():
+            aio.configure(max_workers=1, max_concurrency=1)
+            calls = [asyncio.create_task(aio.get_runner().run(time.sleep, 0.05)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            aio.configure()
+            await asyncio.gather(*calls)
+
+        asyncio.run(main())
+
+    def test_extract_sheets_from_Excel(self):
+        read_path = self.dir / 'workbook.xlsx'
+        with pd.ExcelWriter(read_path) as writer:
+            for sheet in ('first', 'second'):
+                self.df.to_excel(writer, sheet_name=sheet, index=False)
+        for directory in ('sheets', 'cancelled'):
+            (self.dir / directory).mkdir()
+
+        paths = asyncio.run(aio.extract_sheets_from_Excel(read_path, self.dir / 'sheets', file_name_prefix='wb_'))
+        self.assertEqual([path.name for path in paths], ['wb_first.csv', 'wb_second.csv'])
+        pd.testing.assert_frame_equal(pd.read_csv(paths[1]), self.df)
+
+        # Cancelling leaves only complete files behind:
+        executor = ThreadPoolExecutor(max_workers=2)
+        runner = AsyncRunner(executor=executor)
+
+        async def cancelled():
+            task = asyncio.create_task(runner.extract_sheets_from_Excel(read_path, self.dir / 'cancelled'))
+            await asyncio.sleep(0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancelled())
+        executor.shutdown(wait=True)
+        for path in self.dir.glob('cancelled/*'):
+            self.assertEqual(path.suffix, '.csv')
+            pd.testing.assert_frame_equal(pd.read_csv(path), self.df)
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from vegetable_patch.cli import expand_inputs, main, run
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.input_dir = self.dir / 'inputs'
+        (self.input_dir / 'nested').mkdir(parents=True)
+        for i, directory in enumerate((self.input_dir, self.input_dir, self.input_dir / 'nested')):
+            pd.DataFrame({'id': [1, 2], 'date': ['01.02.2024', '31.12.1999']}).to_csv(directory / f'data_{i}.csv', index=False)
+        (self.input_dir / 'notes.txt').write_text('01.02.2024')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_expand_inputs(self):
+        self.assertEqual(len(expand_inputs([self.input_dir], '*.csv')), 2)
+        self.assertEqual(len(expand_inputs([self.input_dir], '*.csv', recursive=True)), 3)
+        self.assertEqual(len(expand_inputs([self.input_dir / '**' / '*.csv', self.input_dir / 'data_0.csv'], '*.csv')), 3)
+        self.assertRaises(FileNotFoundError, expand_inputs, [self.input_dir / '*.xlsx'], '*.xlsx')
+
+    def test_run(self):
+        progress = []
+        results = run(
+            'normalize-dates', [self.input_dir], self.dir / 'dates', jobs=2, recursive=True,
+            progress=lambda n_done, n_total, result: progress.append((n_done, n_total)),
+        )
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result.error is None for result in results))
+        self.assertEqual(sorted(progress), [(1, 3), (2, 3), (3, 3)])
+        self.assertIn('2024-02-01', (self.dir / 'dates' / 'data_0.csv').read_text())
+
+        results = run('dump-dtypes', [self.input_dir / 'data_0.csv'], self.dir / 'schemas')
+        self.assertEqual(json.loads(results[0].outputs[0].read_text()), {'id': 'int64', 'date': 'str'})
+
+    def test_run_same_names(self):
+        (self.input_dir / 'other').mkdir()
+        pd.DataFrame({'id': [3], 'date': ['02.03.2024']}).to_csv(self.input_dir / 'other' / 'data_2.csv', index=False)
+
+        # Outputs keep the subdirectories below a directory input or the start of a pattern, so same-named files do not overwrite each other:
+        for i, inputs in enumerate(([self.input_dir], [self.input_dir / '**' / '*.csv'])):
+            output_dir = self.dir / f'dates_{i}'
+            results = run('normalize-dates', inputs, output_dir, jobs=2, recursive=True)
+            self.assertEqual(len(results), 4)
+            self.assertIn('2024-02-01', (output_dir / 'nested' / 'data_2.csv').read_text())
+            self.assertIn('2024-03-02', (output_dir / 'other' / 'data_2.csv').read_text())
+
+        # Same-named files from separate inputs would write the same outputs, so nothing is processed:
+        inputs = [self.input_dir / 'nested' / 'data_2.csv', self.input_dir / 'other']
+        with self.assertRaisesRegex(ValueError, 'same outputs'):
+            run('dump-dtypes', inputs, self.dir / 'schemas')
+        self.assertFalse((self.dir / 'schemas').exists())
+
+    def test_main(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            exit_code = main(['normalize-dates', str(self.input_dir), '--pattern', '*', '-o', str(self.dir / 'dates'), '--date-format', 'dd.mm.yyyy'])
+        self.assertEqual(exit_code, 0)
+        self.assertIn('3 of 3 file(s) done', stdout.getvalue())
+
+        # Failed files are reported, and give exit code 1:
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            exit_code = main(['extract-sheets', str(self.input_dir / 'data_0.csv'), '-o', str(self.dir / 'sheets')])
+        self.assertEqual(exit_code, 1)
+        self.assertIn('FAILED', stdout.getvalue())
@@ -0,0 +1,376 @@
+import os
+import random
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+
+from vegetable_patch.dataframe_utils import extract_sheets_from_Excel, extract_sheets_from_Excel_incremental, store_dtypes_as_csv, store_dtypes_as_json, load_dtypes, read_csv_with_dtypes
+from vegetable_patch.dataframe_utils import optimize_dtypes, normalize_string_columns, set_column_order, reorder_columns
+from vegetable_patch.dataframe_utils import atomic_write, ConcurrentWriter, infer_dtypes, store_dtypes_from_file
+from vegetable_patch.string_utils import format_string, DateNormalizer
+
+
+class TestExtractSheetsFromExcel(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.sheets = {
+            'first': pd.DataFrame({'a': range(25), 'b': [f'value {i}' for i in range(25)]}),
+            'second': pd.DataFrame({'c': [1.5, None, 2.5]}),
+        }
+        self.read_path = self.dir / 'workbook.xlsx'
+        with pd.ExcelWriter(self.read_path) as writer:
+            for sheet, df in self.sheets.items():
+                df.to_excel(writer, sheet_name=sheet, index=False)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_sheets_extracted(self, write_paths):
+        self.assertEqual([path.name for path in write_paths], ['pre_first_suf.csv', 'pre_second_suf.csv'])
+        for path, df in zip(write_paths, self.sheets.values()):
+            pd.testing.assert_frame_equal(pd.read_csv(path), df, check_dtype=False)
+
+    def test_extract_sheets_from_Excel(self):
+        self.assert_sheets_extracted(extract_sheets_from_Excel(self.read_path, self.dir, 'pre_', '_suf'))
+
+    def test_extract_sheets_from_Excel_parallel_chunks(self):
+        self.assert_sheets_extracted(
+            extract_sheets_from_Excel(self.read_path, self.dir, 'pre_', '_suf', max_workers=2, chunk_size=7)
+        )
+
+    def test_extract_sheets_from_Excel_columnar_formats(self):
+        for output_format, read_function in (('parquet', pd.read_parquet), ('feather', pd.read_feather)):
+            for chunk_size in (None, 10):
+                write_paths = extract_sheets_from_Excel(self.read_path, self.dir, output_format=output_format, chunk_size=chunk_size)
+
+                self.assertEqual([path.name for path in write_paths], [f'first.{output_format}', f'second.{output_format}'])
+                for path, df in zip(write_paths, self.sheets.values()):
+                    pd.testing.assert_frame_equal(read_function(path), df)
+
+    def test_extract_sheets_from_Excel_duplicate_headers(self):
+        read_path = self.dir / 'duplicates.xlsx'
+        pd.DataFrame([[1, 2, 3, 4]], columns=['x', 'x', 'x.1', 'x']).to_excel(read_path, sheet_name='dupes', index=False)
+        expected = pd.read_excel(read_path)
+
+        for output_format, read_function in (('csv', pd.read_csv), ('parquet', pd.read_parquet)):
+            write_paths = extract_sheets_from_Excel(read_path, self.dir, output_format=output_format, chunk_size=10)
+            pd.testing.assert_frame_equal(read_function(write_paths[0]), expected)
+
+    def test_extract_sheets_from_Excel_leading_empty_cells(self):
+        read_path = self.dir / 'empty.xlsx'
+        pd.DataFrame({'value': [None, None, 1.5, 2.5, 3.0, 4.0], 'text': [None] * 4 + ['a', 'b']}).to_excel(read_path, index=False)
+        expected = pd.read_excel(read_path)
+
+        # Chunks are held back until the type of a column that is empty in the first chunk is known:
+        for output_format, read_function in (('parquet', pd.read_parquet), ('feather', pd.read_feather)):
+            write_paths = extract_sheets_from_Excel(read_path, self.dir, output_format=output_format, chunk_size=2)
+            pd.testing.assert_frame_equal(read_function(write_paths[0]), expected)
+
+        # Values that only come after the held back chunks are not cast to strings:
+        pd.DataFrame({'value': [None] * 20 + [1.5]}).to_excel(read_path, index=False)
+        with self.assertRaisesRegex(ValueError, "Column 'value' in 'Sheet1.parquet' is empty"):
+            extract_sheets_from_Excel(read_path, self.dir, output_format='parquet', chunk_size=1)
+
+    def test_extract_sheets_from_Excel_formatted_empty_cells(self):
+        import openpyxl
+
+        read_path = self.dir / 'formatted.xlsx'
+        workbook = openpyxl.Workbook()
+        worksheet = workbook.active
+        for row in (['a', 'b', None, 'd'], [1, 'x', None, 2.5], [], [3, 'y', None, 4.5]):
+            worksheet.append(row)
+        # Formatting an empty cell extends the dimensions of the sheet:
+        worksheet['F10'].font = openpyxl.styles.Font(bold=True)
+        workbook.save(read_path)
+        expected = pd.read_excel(read_path)
+
+        # Same columns and rows as reading the sheet at once (the empty column is stored as strings in Parquet, so dtypes are not compared):
+        for output_format, read_function in (('csv', pd.read_csv), ('parquet', pd.read_parquet)):
+            write_paths = extract_sheets_from_Excel(read_path, self.dir, output_format=output_format, chunk_size=2)
+            pd.testing.assert_frame_equal(read_function(write_paths[0]), expected, check_dtype=output_format == 'csv')
+        self.assertEqual(infer_dtypes(read_path, chunk_size=2).n_rows, 3)
+
+    def test_extract_sheets_from_Excel_mixed_types(self):
+        read_path = self.dir / 'mixed.xlsx'
+        pd.DataFrame({'id': [1, 'A2', 3]}).to_excel(read_path, sheet_name='ids', index=False)
+
+        for chunk_size in (None, 10):
+            with self.assertRaisesRegex(ValueError, "'ids.parquet'"):
+                extract_sheets_from_Excel(read_path, self.dir, output_format='parquet', chunk_size=chunk_size)
+        self.assertEqual(pd.read_csv(extract_sheets_from_Excel(read_path, self.dir)[0])['id'].tolist(), ['1', 'A2', '3'])
+
+    def test_extract_sheets_from_Excel_compressed_csv(self):
+        write_paths = extract_sheets_from_Excel(self.read_path, self.dir, compression='gzip', chunk_size=10)
+
+        self.assertEqual(write_paths[0].name, 'first.csv.gz')
+        pd.testing.assert_frame_equal(pd.read_csv(write_paths[0]), self.sheets['first'])
+
+    def test_extract_sheets_from_Excel_zipped_csv(self):
+        for chunk_size in (None, 10):
+            write_paths = extract_sheets_from_Excel(self.read_path, self.dir, compression='zip', chunk_size=chunk_size)
+
+            self.assertEqual(write_paths[0].name, 'first.csv.zip')
+            with zipfile.ZipFile(write_paths[0]) as archive:
+                self.assertEqual(archive.namelist(), ['first.csv'])
+            pd.testing.assert_frame_equal(pd.read_csv(write_paths[0]), self.sheets['first'])
+
+    def test_extract_sheets_from_Excel_sheet_names(self):
+        write_paths = extract_sheets_from_Excel(self.read_path, self.dir, sheet_names=['second'])
+
+        self.assertEqual([path.name for path in write_paths], ['second.csv'])
+        self.assertRaises(ValueError, extract_sheets_from_Excel, self.read_path, self.dir, sheet_names=['missing'])
+
+    def test_extract_sheets_from_Excel_incremental(self):
+        output_dir = self.dir / 'output'
+        output_dir.mkdir()
+        first_path, second_path = output_dir / 'first.csv', output_dir / 'second.csv'
+
+        summary = extract_sheets_from_Excel_incremental(self.read_path, output_dir)
+        self.assertEqual(summary.written, [first_path, second_path])
+
+        # Nothing changed, so the workbook is not opened:
+        summary = extract_sheets_from_Excel_incremental([self.read_path], output_dir)
+        self.assertEqual(summary, ([], [first_path, second_path], [self.read_path]))
+
+        # Only the missing output is rewritten:
+        second_path.unlink()
+        summary = extract_sheets_from_Excel_incremental(self.read_path, output_dir)
+        self.assertEqual(summary, ([second_path], [first_path], []))
+
+        # Other options extract the whole workbook again:
+        summary = extract_sheets_from_Excel_incremental(self.read_path, output_dir, output_format='parquet')
+        self.assertEqual(summary.written, [output_dir / 'first.parquet', output_dir / 'second.parquet'])
+
+        # A changed workbook is extracted in full:
+        with pd.ExcelWriter(self.read_path) as writer:
+            self.sheets['first'].head(3).to_excel(writer, sheet_name='first', index=False)
+        summary = extract_sheets_from_Excel_incremental(self.read_path, output_dir, output_format='parquet')
+        self.assertEqual(summary.written, [output_dir / 'first.parquet'])
+
+    def test_extract_sheets_from_Excel_incremental_relative_dir(self):
+        (self.dir / 'output').mkdir()
+        (self.dir / 'other').mkdir()
+        cwd = os.getcwd()
+        try:
+            os.chdir(self.dir)
+            extract_sheets_from_Excel_incremental(self.read_path, 'output')
+
+            # The same output directory from another working directory is up to date:
+            os.chdir(self.dir / 'other')
+            summary = extract_sheets_from_Excel_incremental(self.read_path, self.dir / 'output')
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(summary.written, [])
+        self.assertEqual(summary.skipped_workbooks, [self.read_path])
+
+
+class TestDtypeSchema(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.df = pd.DataFrame({
+            'id': [1, 2, 3],
+            'group': pd.Categorical(['a', 'b', 'a']),
+            'count': pd.array([1, None, 3], dtype='Int64'),
+            'date': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']).astype('datetime64[ns]'),
+            'flag': [True, False, True],
+            'duration': pd.to_timedelta(['1 days 02:00:00', None, '0 days 00:00:01.5']).astype('timedelta64[ns]'),
+        })
+        self.csv_path = self.dir / 'data.csv'
+        self.df.to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_store_dtypes_as_json_suffix(self):
+        store_dtypes_as_json(self.df, directory_path=self.dir, file_name='dtypes', print_success=False)
+        self.assertTrue((self.dir / 'dtypes.json').exists())
+
+    def test_load_dtypes(self):
+        store_dtypes_as_json(self.df, directory_path=self.dir, file_name='dtypes', print_success=False)
+        store_dtypes_as_csv(self.df, directory_path=self.dir, file_name='dtypes', print_success=False)
+
+        expected_dtypes = self.df.dtypes.astype(str).to_dict()
+        self.assertEqual(load_dtypes(self.dir / 'dtypes.json'), expected_dtypes)
+        self.assertEqual(load_dtypes(self.dir / 'dtypes.csv'), expected_dtypes)
+
+    def test_read_csv_with_dtypes(self):
+        store_dtypes_as_json(self.df, directory_path=self.dir, file_name='dtypes', print_success=False)
+
+        for use_pyarrow in (False, True):
+            df = read_csv_with_dtypes(self.csv_path, self.dir / 'dtypes.json', use_pyarrow=use_pyarrow)
+            pd.testing.assert_frame_equal(df, self.df)
+
+    def test_read_csv_with_dtypes_usecols(self):
+        store_dtypes_as_json(self.df, directory_path=self.dir, file_name='dtypes', print_success=False)
+
+        for usecols in (['id', 'count'], [0, 2], lambda column: column in ('id', 'count')):
+            df = read_csv_with_dtypes(self.csv_path, self.dir / 'dtypes.json', usecols=usecols)
+            pd.testing.assert_frame_equal(df, self.df[['id', 'count']])
+        df = read_csv_with_dtypes(self.csv_path, self.dir / 'dtypes.json', usecols=['date'], use_pyarrow=True)
+        pd.testing.assert_frame_equal(df, self.df[['date']])
+
+    def test_infer_dtypes(self):
+        n_rows = 1000
+        df = pd.DataFrame({
+            'int': range(n_rows),
+            'missing_late': [1] * 900 + [None] + [2] * 99,
+            'missing_chunk': [1] * 500 + [None] * 100 + [3] * 400,
+            'all_missing': [None] * n_rows,
+            'text': ['a'] * n_rows,
+        })
+        csv_path, excel_path = self.dir / 'large.csv', self.dir / 'large.xlsx'
+        df.to_csv(csv_path, index=False)
+        df.to_excel(excel_path, index=False)
+        df.assign(mixed=[1] * 800 + ['x'] * 200).to_csv(self.dir / 'mixed.csv', index=False)
+
+        # Same dtypes as reading the whole file at once:
+        for path, read_function in ((csv_path, pd.read_csv), (excel_path, pd.read_excel)):
+            inference = infer_dtypes(path, chunk_size=100)
+            self.assertEqual(inference.dtypes, read_function(path).dtypes.astype(str).to_dict())
+            self.assertEqual(inference.n_rows, n_rows)
+
+        # Conflicting dtypes fall back to object, and are reported:
+        inference = infer_dtypes(self.dir / 'mixed.csv', chunk_size=100)
+        self.assertEqual(inference.dtypes['mixed'], 'object')
+        self.assertEqual(list(inference.conflicts), ['mixed'])
+        self.assertEqual(infer_dtypes(self.dir / 'mixed.csv', chunk_size=100, max_rows=500).conflicts, {})
+
+        path, inference = store_dtypes_from_file(csv_path, directory_path=self.dir, file_name='schema', file_format='csv', chunk_size=100)
+        self.assertEqual(load_dtypes(path), inference.dtypes)
+
+
+class TestOptimizeDtypes(unittest.TestCase):
+    def test_optimize_dtypes(self):
+        df = pd.DataFrame({
+            'small_int': range(100),
+            'large_int': [i * 100_000 for i in range(100)],
+            'exact_float': [i / 4 for i in range(100)],
+            'inexact_float': [i / 3 for i in range(100)],
+            'half_float': pd.Series([i / 4 for i in range(100)], dtype='float16'),
+            'nullable_float': pd.array([i / 4 for i in range(99)] + [None], dtype='Float64'),
+            'low_cardinality': ['a', 'b'] * 50,
+            'high_cardinality': [f'value {i}' for i in range(100)],
+        })
+        optimized_df, report = optimize_dtypes(df)
+
+        self.assertEqual(
+            optimized_df.dtypes.astype(str).tolist(),
+            ['int8', 'int32', 'float32', 'float64', 'float16', 'Float32', 'category', str(df['high_cardinality'].dtype)]
+        )
+        pd.testing.assert_frame_equal(optimized_df, df, check_dtype=False, check_categorical=False)
+        self.assertLess(report['memory_after'].sum(), report['memory_before'].sum())
+        self.assertEqual(report.loc['small_int', 'dtype_before'], 'int64')
+
+    def test_optimize_dtypes_category_threshold(self):
+        df = pd.DataFrame({'missing': pd.Series([None] * 10, dtype=object), 'group': ['a', 'b'] * 5})
+
+        self.assertEqual(optimize_dtypes(df, category_threshold=0)[0].dtypes.astype(str).tolist(), ['object', str(df['group'].dtype)])
+        self.assertEqual(optimize_dtypes(df)[0].dtypes.astype(str).tolist(), ['object', 'category'])
+
+    def test_optimize_dtypes_stores_schema(self):
+        df = pd.DataFrame({'id': range(10), 'group': ['a', 'b'] * 5})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dtypes_path = Path(tmp_dir) / 'schema' / 'dtypes.json'
+            csv_path = Path(tmp_dir) / 'data.csv'
+            optimized_df, _ = optimize_dtypes(df, dtypes_path=dtypes_path)
+            df.to_csv(csv_path, index=False)
+
+            pd.testing.assert_frame_equal(read_csv_with_dtypes(csv_path, dtypes_path), optimized_df)
+
+
+class TestNormalizeStringColumns(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'name': ['Sample  A', 'sample a', None, 'Sample  A'],
+            'date': ['01.02.2024', '02.02.2024', '01.02.2024', '31.02.2024'],
+            'count': [1, 2, 3, 4],
+        })
+
+    def test_normalize_string_columns(self):
+        normalized_df = normalize_string_columns(self.df, {'case_to': 'lower'}, columns=['name'])
+
+        self.assertEqual(normalized_df['name'].iloc[[0, 1, 3]].tolist(), [format_string('Sample  A', case_to='lower')] * 3)
+        self.assertTrue(pd.isna(normalized_df['name'].iloc[2]))
+        pd.testing.assert_frame_equal(normalized_df[['date', 'count']], self.df[['date', 'count']])
+        self.assertEqual(self.df['name'].iloc[0], 'Sample  A')
+
+    def test_normalize_string_columns_process_pool(self):
+        normalized_df = normalize_string_columns(self.df, DateNormalizer(), columns=['date'], max_workers=2, parallel_threshold=1)
+
+        self.assertEqual(normalized_df['date'].tolist(), ['2024-02-01', '2024-02-02', '2024-02-01', '31.02.2024'])
+
+    def test_normalize_string_columns_missing_column(self):
+        self.assertRaises(ValueError, normalize_string_columns, self.df, str.lower, columns=['missing'])
+
+
+class TestReorderColumns(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame([range(50)], columns=[f'col_{i}' for i in range(50)])
+
+    def test_set_column_order(self):
+        self.assertEqual(list(set_column_order(self.df, 'col_0', 'col_2').columns[:4]), ['col_1', 'col_2', 'col_0', 'col_3'])
+        self.assertRaises(ValueError, set_column_order, self.df, 'missing', 'col_2')
+
+    def test_reorder_columns_moves(self):
+        rng = random.Random(0)
+        moves = [tuple(rng.sample(list(self.df.columns), 2)) for _ in range(100)]
+
+        # Same result as moving one column at a time with list operations:
+        expected_columns = list(self.df.columns)
+        for column_to_move, after_column in moves:
+            expected_columns.remove(column_to_move)
+            expected_columns.insert(expected_columns.index(after_column) + 1, column_to_move)
+
+        for copy in (True, False):
+            reordered_df = reorder_columns(self.df, moves=moves, copy=copy)
+            self.assertEqual(list(reordered_df.columns), expected_columns)
+            self.assertEqual(reordered_df.iloc[0].tolist(), [int(column[4:]) for column in expected_columns])
+
+    def test_reorder_columns_order(self):
+        reordered_df = reorder_columns(self.df, order=['col_3', 'col_1'], moves={'col_0': 'col_49'})
+        self.assertEqual(list(reordered_df.columns[:3]), ['col_3', 'col_1', 'col_2'])
+        self.assertEqual(reordered_df.columns[-1], 'col_0')
+
+        self.assertRaises(ValueError, reorder_columns, self.df, order=['col_1', 'col_1'])
+        self.assertRaises(ValueError, reorder_columns, self.df, moves=[('col_1', 'col_1')])
+
+
+
+class TestWriters(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_atomic_write(self):
+        path = self.dir / 'file.txt'
+        with atomic_write(path, fsync=True) as file:
+            file.write('old')
+
+        # A failed write keeps the old file, and leaves no temporary file behind:
+        with self.assertRaises(RuntimeError):
+            with atomic_write(path) as file:
+                file.write('new')
+                raise RuntimeError
+        self.assertEqual(path.read_text(), 'old')
+        self.assertEqual(list(self.dir.iterdir()), [path])
+
+    def test_concurrent_writer(self):
+        df = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+        with ConcurrentWriter(max_workers=4, max_pending=2) as writer:
+            for i in range(10):
+                writer.submit(store_dtypes_as_json, df, directory_path=self.dir, file_name=f'dtypes_{i}')
+        self.assertEqual(writer.results, [self.dir / f'dtypes_{i}.json' for i in range(10)])
+        self.assertEqual(sorted(self.dir.iterdir()), sorted(writer.results))
+
+        # Errors of writes are raised when leaving the block:
+        with self.assertRaises(FileNotFoundError):
+            with ConcurrentWriter() as writer:
+                writer.submit(store_dtypes_as_csv, df, directory_path=self.dir / 'missing', file_name='dtypes')
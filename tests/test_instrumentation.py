@@ -0,0 +1,85 @@
+import json
+import pickle
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from vegetable_patch import instrumentation
+from vegetable_patch.dataframe_utils import reorder_columns, store_dtypes_as_json
+from vegetable_patch.path_utils import check_read_file
+from vegetable_patch.string_utils import format_string, format_strings
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_by_default(self):
+        format_string('a  b')
+        self.assertFalse(instrumentation.is_enabled())
+        self.assertEqual(instrumentation.snapshot(), {})
+
+    def test_snapshot(self):
+        instrumentation.enable()
+        for string in ('a  b', 'abc', 'abcdefgh'):
+            format_string(string)
+        format_strings(pd.Series(['a', 'b']))
+        reorder_columns(pd.DataFrame({'a': [1], 'b': [2]}), order=['b'])
+        self.assertRaises(FileNotFoundError, check_read_file, 'no_such_file.txt')
+
+        stats = instrumentation.snapshot()
+        self.assertEqual(stats['string_utils.format_string']['calls'], 3)
+        self.assertEqual(stats['string_utils.format_string']['total_input_size'], 4 + 3 + 8)
+        self.assertEqual(stats['string_utils.format_string']['max_input_size'], 8)
+        self.assertEqual(stats['string_utils.format_strings']['input_unit'], 'rows')
+        self.assertEqual(stats['dataframe_utils.reorder_columns']['total_input_size'], 2)
+        self.assertEqual(stats['path_utils.check_read_file']['errors'], 1)
+        self.assertLessEqual(stats['string_utils.format_string']['p50_seconds'], stats['string_utils.format_string']['max_seconds'])
+        self.assertEqual(json.loads(instrumentation.to_json()), stats)
+
+    def test_callback(self):
+        records = []
+        instrumentation.enable(callback=records.append)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store_dtypes_as_json(pd.DataFrame({'a': [1]}), full_path=Path(tmp_dir) / 'dtypes.json')
+
+        self.assertEqual([record.function for record in records], ['dataframe_utils.store_dtypes_as_json'])
+        self.assertEqual((records[0].input_size, records[0].unit, records[0].error), (1, 'columns', None))
+
+        # Disabling stops recording, but keeps the statistics:
+        instrumentation.disable()
+        format_string('a')
+        self.assertEqual(len(records), 1)
+        self.assertEqual(list(instrumentation.snapshot()), ['dataframe_utils.store_dtypes_as_json'])
+
+    def test_nested_calls(self):
+        @instrumentation.instrumented()
+        def inner():
+            time.sleep(0.02)
+
+        @instrumentation.instrumented()
+        def outer():
+            inner()
+            inner()
+
+        instrumentation.enable()
+        outer()
+        stats = {name.rsplit('.', 1)[-1]: function_stats for name, function_stats in instrumentation.snapshot().items()}
+        outer_stats, inner_stats = stats['outer'], stats['inner']
+
+        # Total times include nested calls, self times do not, so only the self times add up to the total time:
+        self.assertGreaterEqual(outer_stats['total_seconds'], inner_stats['total_seconds'])
+        self.assertEqual(inner_stats['total_self_seconds'], inner_stats['total_seconds'])
+        self.assertAlmostEqual(outer_stats['total_self_seconds'], outer_stats['total_seconds'] - inner_stats['total_seconds'])
+        self.assertLess(outer_stats['total_self_seconds'], 0.01)
+
+    def test_instrumented_functions_are_picklable(self):
+        self.assertIs(pickle.loads(pickle.dumps(format_string)), format_string)
@@ -1,6 +1,9 @@
+import os
+import tempfile
 import unittest
 from vegetable_patch import vegetable_patch
-from vegetable_patch.path_utils import get_stem_path
+from vegetable_patch.path_utils import get_stem_path, check_paths, check_read_file, check_write_file
+from vegetable_patch.path_utils import find_project_root, clear_project_root_cache, FileIndex
 # from vegetable_patch.path_utils import get_stem_path
 
 from pathlib import Path
@@ -12,4 +15,120 @@ class TestGetStemPath(unittest.TestCase):
         # TODO What happens if pytest is run from another directory?
         self.assertEqual(get_stem_path("tests"), str(Path.cwd()))
         # Check that error is thrown when looking for a directory that is not in the stem path:
-        self.assertRaises(ModuleNotFoundError, get_stem_path, "fictional_dir")
\ No newline at end of file
+        self.assertRaises(ModuleNotFoundError, get_stem_path, "fictional_dir")
+
+class TestCheckPaths(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.existing_file = self.dir / 'existing.csv'
+        self.existing_file.write_text('a,b\n')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_check_paths_read(self):
+        paths = [self.existing_file, self.dir / 'missing.csv', self.dir]
+        checks = check_paths(paths, mode='r', max_workers=2)
+
+        self.assertEqual([check.path for check in checks], [str(path) for path in paths])
+        self.assertEqual([check.ok for check in checks], [True, False, False])
+        self.assertIsInstance(checks[1].error, FileNotFoundError)
+        self.assertIsInstance(checks[2].error, IsADirectoryError)
+
+    def test_check_paths_write_does_not_create_files(self):
+        paths = [self.existing_file, self.dir / 'new.csv', self.dir / 'missing_dir' / 'new.csv']
+        checks = check_paths(paths, mode='w')
+
+        self.assertEqual([check.ok for check in checks], [True, True, False])
+        self.assertFalse((self.dir / 'new.csv').exists())
+        self.assertRaises(ValueError, check_paths, paths, mode='a')
+
+    def test_check_read_and_write_file(self):
+        check_read_file(self.existing_file)
+        self.assertRaises(FileNotFoundError, check_read_file, self.dir / 'missing.csv')
+
+        check_write_file(self.dir / 'new.csv')
+        self.assertFalse((self.dir / 'new.csv').exists())
+
+
+class TestFindProjectRoot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name).resolve() / 'project'
+        self.nested = self.root / 'src' / 'package'
+        self.nested.mkdir(parents=True)
+        (self.root / 'pyproject.toml').touch()
+        self.cwd = os.getcwd()
+        os.chdir(self.nested)
+        clear_project_root_cache()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        clear_project_root_cache()
+        self.tmp_dir.cleanup()
+
+    def test_find_project_root_markers(self):
+        self.assertEqual(find_project_root(), self.root)
+
+        (self.nested / '.sentinel').touch()
+        self.assertEqual(find_project_root(markers=['.sentinel']), self.nested)
+        self.assertRaises(ModuleNotFoundError, find_project_root, markers=['.missing'], ceiling=self.root)
+
+    def test_find_project_root_by_name(self):
+        self.assertEqual(find_project_root(stem_dir_name='project'), self.root)
+        self.assertEqual(get_stem_path('src'), str(self.root / 'src'))
+        self.assertRaises(ModuleNotFoundError, find_project_root, stem_dir_name='project', ceiling=self.nested)
+
+    def test_find_project_root_cache(self):
+        self.assertEqual(find_project_root(), self.root)
+        (self.root / 'pyproject.toml').unlink()
+        # Cached until cleared:
+        self.assertEqual(find_project_root(), self.root)
+        clear_project_root_cache()
+        self.assertRaises(ModuleNotFoundError, find_project_root, ceiling=self.root)
+
+
+class TestFileIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name).resolve() / 'data'
+        for relative_path in ('a.csv', 'b.txt', 'raw/c.csv', 'raw/2024/d.csv', 'raw/2024/e.xlsx'):
+            path = self.root / relative_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text('content')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_same_paths(self, paths, expected_paths):
+        self.assertEqual(sorted(paths), sorted(expected_paths))
+
+    def test_file_index_queries(self):
+        index = FileIndex(self.root)
+
+        self.assertEqual(len(index), 5)
+        self.assert_same_paths(index.rglob('*.csv'), self.root.rglob('*.csv'))
+        self.assert_same_paths(index.glob('*.csv'), self.root.glob('*.csv'))
+        self.assert_same_paths(index.glob('raw/**/*.xlsx'), [self.root / 'raw/2024/e.xlsx'])
+        self.assert_same_paths(index.with_suffix('.txt', '.xlsx'), [self.root / 'b.txt', self.root / 'raw/2024/e.xlsx'])
+        self.assertEqual(index.entries('b.txt')[0].size, len('content'))
+
+    def test_file_index_incremental_refresh(self):
+        index = FileIndex(self.root)
+        self.assertEqual(index.refresh(), 0)
+
+        (self.root / 'raw/2024/f.csv').write_text('new')
+        (self.root / 'a.csv').unlink()
+        # Only the root and 'raw/2024' changed:
+        self.assertEqual(index.refresh(), 2)
+        self.assert_same_paths(index.rglob('*.csv'), self.root.rglob('*.csv'))
+
+    def test_file_index_on_disk(self):
+        index_path = Path(self.tmp_dir.name) / 'index.json'
+        FileIndex(self.root, index_path=index_path)
+        (self.root / 'raw/g.csv').write_text('new')
+
+        index = FileIndex(self.root, index_path=index_path)
+        self.assert_same_paths(index.rglob('*.csv'), self.root.rglob('*.csv'))
+        self.assertEqual(index.refresh(), 0)
@@ -1,7 +1,10 @@
+import tempfile
 import unittest
+from pathlib import Path
 
 from vegetable_patch import vegetable_patch
-from vegetable_patch.string_utils import replace_case_insensitive
+from vegetable_patch.string_utils import replace_case_insensitive, format_string, format_strings, StringFormatter, CaseInsensitiveReplacer
+from vegetable_patch.string_utils import dayfirst_to_international_format_date, rewrite_file, DateNormalizer, ProtectedVocabulary
 
 class TestReplaceCaseInsensitive(unittest.TestCase):
     def test_replace_case_insensitive(self):
@@ -16,3 +19,165 @@ class TestReplaceCaseInsensitive(unittest.TestCase):
             expected_res
         )
 
+
+
+class TestFormatStrings(unittest.TestCase):
+    def test_format_strings_matches_format_string(self):
+        strings = ['  hello   world ', 'HELLO_world', '', 'pH value', 'hello   world', 'pH value']
+        settings = dict(sep='_', case_to='capitalize', capitalize_substrings=True, ignore_words=['pH'])
+
+        expected_res = [format_string(string, **settings) for string in strings]
+
+        self.assertEqual(format_strings(strings, **settings), expected_res)
+        self.assertEqual(format_strings(iter(strings), **settings), expected_res)
+
+    def test_format_strings_series(self):
+        import pandas as pd
+
+        series = pd.Series(['a  b', 'A B', 'a  b', None], index=[10, 11, 12, 13], name='col')
+        res = format_strings(series, case_to='upper')
+
+        self.assertEqual(res.name, 'col')
+        self.assertEqual(list(res.index), [10, 11, 12, 13])
+        self.assertEqual(res.iloc[:3].tolist(), ['A B', 'A B', 'A B'])
+        self.assertTrue(pd.isna(res.iloc[3]))
+
+    def test_format_strings_validates_settings(self):
+        self.assertRaises(ValueError, format_strings, ['a'], case_to='title')
+
+    def test_format_string_reuses_formatter(self):
+        from vegetable_patch.string_utils.utils import _cached_formatter
+
+        format_string('a_b', sep='_', case_to='upper', ignore_words=['b'])
+        hits = _cached_formatter.cache_info().hits
+        self.assertEqual(format_string('c_b', sep='_', case_to='upper', ignore_words=['b']), 'C b')
+        self.assertEqual(_cached_formatter.cache_info().hits, hits + 1)
+
+        # Settings that cannot be cached are still validated:
+        self.assertRaises(ValueError, format_string, 'a', case_to=['upper'])
+        self.assertRaises(ValueError, format_string, 'a', case_to='title')
+
+
+class TestStringFormatter(unittest.TestCase):
+    def test_string_formatter(self):
+        formatter = StringFormatter(sep='_', case_to='lower', ignore_words=['pH'])
+
+        self.assertEqual(formatter('__Sample_pH__VALUE_'), format_string('__Sample_pH__VALUE_', sep='_', case_to='lower', ignore_words=['pH']))
+        self.assertEqual(formatter.map(['A_B', 'pH_X', 'A_B']), ['a b', 'pH x', 'a b'])
+        self.assertRaises(AttributeError, setattr, formatter, 'unknown_setting', True)
+
+    def test_string_formatter_escapes_return_sep(self):
+        self.assertEqual(StringFormatter(return_sep='.')('..a..b.'), 'a.b')
+        self.assertEqual(format_string('a||b|', return_sep='|'), 'a|b')
+        self.assertEqual(format_string('a b', return_sep='\\'), 'a\\b')
+
+
+class TestProtectedVocabulary(unittest.TestCase):
+    def test_from_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'vocabulary.txt'
+            path.write_text('# Units and acronyms\npH\n\n 3D \nmRNA\npH\n')
+            vocabulary = ProtectedVocabulary.from_file(path)
+
+        self.assertEqual(len(vocabulary), 3)
+        self.assertIn('MRNA', vocabulary)
+        self.assertEqual(vocabulary.get('3d'), '3D')
+        self.assertRaises(ValueError, vocabulary.add, 'PH')
+
+    def test_format_with_protected(self):
+        vocabulary = ProtectedVocabulary(['pH', '3D', 'BRCA1'])
+        formatter = StringFormatter(sep='_', case_to='lower', protected=vocabulary)
+        self.assertEqual(formatter('PH_of_brca1__Sample_3d'), 'pH of BRCA1 sample 3D')
+
+        # The canonical casing is restored for any case_to, and only the first substring is capitalized unless capitalize_substrings=True:
+        self.assertEqual(format_string('ph VALUE', protected=vocabulary), 'pH VALUE')
+        self.assertEqual(format_string('ph VALUE', case_to='capitalize', protected=vocabulary), 'pH VALUE')
+        self.assertEqual(format_string('value ph', case_to='capitalize', protected=vocabulary), 'Value pH')
+        self.assertEqual(format_string('ph value 3d', case_to='capitalize', capitalize_substrings=True, protected=['pH']), 'pH Value 3d')
+
+        # An empty case_to means no change, like without protected tokens:
+        for case_to in ('', ' '):
+            self.assertEqual(format_string('ph VALUE', case_to=case_to, protected=vocabulary), 'pH VALUE')
+
+        # ignore_words are kept as they are:
+        self.assertEqual(format_string('PH Ph', case_to='upper', ignore_words=['Ph'], protected=vocabulary), 'pH Ph')
+
+        strings = ['PH_value', 'brca1', None, 'PH_value']
+        self.assertEqual(
+            format_strings(strings, sep='_', case_to='upper', protected=vocabulary),
+            [format_string(string, sep='_', case_to='upper', protected=vocabulary) if string else string for string in strings]
+        )
+
+
+
+class TestCaseInsensitiveReplacer(unittest.TestCase):
+    def test_case_insensitive_replacer(self):
+        replacer = CaseInsensitiveReplacer({'coli': 'COLI', 'e. coli': 'Escherichia coli', 'ph': 'pH'})
+
+        # Longest term wins, and replaced text is not scanned again:
+        self.assertEqual(replacer('E. COLI, coli and PH'), 'Escherichia coli, COLI and pH')
+        self.assertEqual(replacer.map(['ph', 'Ph']), ['pH', 'pH'])
+
+    def test_case_insensitive_replacer_whole_words(self):
+        replacer = CaseInsensitiveReplacer({'ph': 'pH'}, whole_words=True)
+        self.assertEqual(replacer('ph phase PH'), 'pH phase pH')
+
+    def test_case_insensitive_replacer_non_ascii(self):
+        replacer = CaseInsensitiveReplacer({'İstanbul': 'X', 'ſtraße': 'Y', 'ΣΟΦΊΑ': 'Z'})
+        self.assertEqual(replacer('İstanbul, istanbul, ISTANBUL'), 'X, X, X')
+        self.assertEqual(replacer('Straße STRAẞE'), 'Y Y')
+        self.assertEqual(replacer('σοφία Σοφία'), 'Z Z')
+
+    def test_case_insensitive_replacer_duplicate_terms(self):
+        self.assertRaises(ValueError, CaseInsensitiveReplacer, {'ph': 'pH', 'PH': 'pH'})
+
+
+class TestDateNormalizer(unittest.TestCase):
+    def test_date_normalizer_formats(self):
+        normalizer = DateNormalizer(formats=('dd.mm.yyyy', 'dd/mm/yyyy', 'dd-mm-yyyy', 'd.m.yy'))
+
+        self.assertEqual(
+            normalizer('01.02.2024, 03/04/2024, 05-06-2024 and 7.8.99'),
+            '2024-02-01, 2024-04-03, 2024-06-05 and 1999-08-07'
+        )
+        self.assertEqual(normalizer.map(['1.2.03', '1.2.03']), ['2003-02-01', '2003-02-01'])
+
+    def test_date_normalizer_invalid_dates(self):
+        self.assertEqual(DateNormalizer()('31.02.2024 and 29.02.2024'), '31.02.2024 and 2024-02-29')
+        self.assertEqual(DateNormalizer().find_invalid_dates('31.02.2024 and 13.13.2024'), ['31.02.2024', '13.13.2024'])
+        self.assertRaises(ValueError, DateNormalizer(on_invalid='raise'), '31.02.2024')
+
+    def test_date_normalizer_invalid_format(self):
+        self.assertRaises(ValueError, DateNormalizer, formats=('dd.mm',))
+
+
+class TestRewriteFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.text = ''.join(
+            f'{i};{i % 28 + 1:02d}.{i % 12 + 1:02d}.20{i % 100:02d};ecoli sample {i}\r\n' for i in range(500)
+        ) + 'last line without line break 01.02.2003'
+        self.read_path = self.dir / 'input.csv'
+        self.read_path.write_bytes(self.text.encode())
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_rewrite_file_chunk_boundaries(self):
+        write_path = self.dir / 'output.csv'
+        # A small chunk size makes lines and dates straddle chunk boundaries:
+        rewrite_file(self.read_path, write_path, dayfirst_to_international_format_date, chunk_size=7)
+
+        self.assertEqual(write_path.read_bytes().decode(), dayfirst_to_international_format_date(self.text))
+
+    def test_rewrite_file_process_pool(self):
+        write_path = self.dir / 'output.csv'
+        replacer = CaseInsensitiveReplacer({'ecoli': 'E. coli'})
+        rewrite_file(self.read_path, write_path, replacer, chunk_size=64, max_workers=3)
+
+        self.assertEqual(write_path.read_bytes().decode(), replacer(self.text))
+        self.assertEqual(sorted(path.name for path in self.dir.iterdir()), ['input.csv', 'output.csv'])
+
+    def test_rewrite_file_same_file(self):
+        self.assertRaises(ValueError, rewrite_file, self.read_path, self.read_path, str.upper)
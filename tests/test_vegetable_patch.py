@@ -8,17 +8,38 @@ import pytest
 from vegetable_patch import vegetable_patch
 
 
-@pytest.fixture
-def response():
-    """Sample pytest fixture.
-
-    See more at: http://doc.pytest.org/en/latest/fixture.html
-    """
-    import requests
-    return requests.get('https://github.com/audreyr/cookiecutter-pypackage')
-
-
-def test_content(response):
-    """Sample pytest test function with the pytest fixture as an argument."""
-    # from bs4 import BeautifulSoup
-    # assert 'GitHub' in BeautifulSoup(response.content).title.string
+def _imported_modules(statement):
+    """Run `statement` in a fresh interpreter with `-X importtime`, and return the names of all imported modules."""
+    import subprocess
+    import sys
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True
+    )
+    # Lines look like 'import time:  self [us] | cumulative | imported package':
+    return {
+        line.rsplit('|', 1)[-1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith('import time:')
+    }
+
+
+def test_import_does_not_load_pandas():
+    """Importing the package, or any of its subpackages, should not pay for importing pandas."""
+    modules = _imported_modules(
+        'import vegetable_patch, vegetable_patch.path_utils, vegetable_patch.string_utils, vegetable_patch.dataframe_utils'
+    )
+
+    assert 'vegetable_patch.string_utils' in modules
+    assert not {module for module in modules if module.split('.')[0] in ('pandas', 'numpy')}
+
+
+def test_lazy_submodule_access():
+    """Subpackages are still available as attributes of the package."""
+    import vegetable_patch as vp
+
+    assert vp.path_utils.get_stem_path is not None
+    assert 'string_utils' in dir(vp)
+    with pytest.raises(AttributeError):
+        vp.no_such_module